@@ -10,19 +10,23 @@ import logging
 import os
 import hashlib
 import hmac
+import queue
 import signal
 import socket
 import sqlite3
-import ssl
 import threading
-import shutil
 import tempfile
+import time
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
+from contextlib import contextmanager
 from datetime import datetime, timedelta, timezone
-from functools import partial
-from typing import Any, Callable, Dict, List, Optional, Set
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
 from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
-from subprocess import CompletedProcess, TimeoutExpired, run
+from subprocess import PIPE, STDOUT, TimeoutExpired, Popen, run
 
 try:
     import grp
@@ -30,7 +34,13 @@ try:
 except ImportError:  # pragma: no cover - non-POSIX systems
     grp = None  # type: ignore
     pwd = None  # type: ignore
-from urllib.parse import parse_qs, urlparse, urlsplit, urlunsplit
+
+try:
+    # 可选加速：pybase64 提供 SIMD 解码，未安装时退回标准库
+    from pybase64 import b64decode as _b64decode
+except ImportError:
+    _b64decode = base64.b64decode
+from urllib.parse import parse_qsl
 
 ###############################################################################
 # Helpers and configuration
@@ -42,7 +52,7 @@ STATIC_ROOT = os.path.join(PARD_DIR, "www")
 DEFAULT_DB_PATH = os.path.join(ROOT_DIR, "scheduler.db")
 DEFAULT_AUTH_PATH = os.path.join(ROOT_DIR, "auth.json")
 IS_WINDOWS = os.name == "nt"
-DB_LATEST_VERSION = 2
+DB_LATEST_VERSION = 6
 def _detect_default_account() -> str:
     for env_key in ("SCHEDULER_DEFAULT_ACCOUNT", "USERNAME", "USER"):
         value = os.environ.get(env_key)
@@ -58,6 +68,9 @@ DEFAULT_HOST = "0.0.0.0"
 DEFAULT_PORT = 28256
 TASK_TIMEOUT = int(os.environ.get("SCHEDULER_TASK_TIMEOUT", "900"))
 CONDITION_TIMEOUT = int(os.environ.get("SCHEDULER_CONDITION_TIMEOUT", "60"))
+MAX_LOG_LINES = int(os.environ.get("SCHEDULER_MAX_LOG_LINES", "10000"))
+# 请求体上限：脚本体/批量 id 列表远小于此值，超限直接 413 防止内存被撑爆
+MAX_REQUEST_BODY = int(os.environ.get("SCHEDULER_MAX_REQUEST_BODY", str(8 * 1024 * 1024)))
 MAX_LOOKAHEAD_MINUTES = 60 * 24 * 366  # one leap year
 EVENT_TYPE_SCRIPT = "script"
 EVENT_TYPE_BOOT = "system_boot"
@@ -71,13 +84,38 @@ class AuthConfig:
     def __init__(self, username: str, password_hash: str, realm: str = "Scheduler"):
         self.username = username
         self.password_hash = password_hash.lower()
+        # 预解码为原始字节，verify 时省去 hexdigest/lower 的字符串分配
+        try:
+            self._password_digest = bytes.fromhex(self.password_hash)
+        except ValueError as exc:
+            raise ValueError("password_sha256 必须为合法的十六进制哈希值") from exc
         self.realm = realm or "Scheduler"
+        # 已通过验证的 Authorization 头指纹；命中后跳过 base64 解码和哈希。
+        # 只缓存成功条目，失败请求永远走完整校验路径
+        self._verified_headers: Set[bytes] = set()
+        self._verified_lock = threading.Lock()
 
     def verify(self, username: str, password: str) -> bool:
         if username != self.username:
             return False
-        hashed = hashlib.sha256(password.encode("utf-8")).hexdigest().lower()
-        return hmac.compare_digest(hashed, self.password_hash)
+        hashed = hashlib.sha256(password.encode("utf-8")).digest()
+        return hmac.compare_digest(hashed, self._password_digest)
+
+    @staticmethod
+    def _header_key(header: str) -> bytes:
+        return hashlib.blake2b(header.encode("utf-8", "surrogateescape"), digest_size=16).digest()
+
+    def check_cached(self, header: str) -> bool:
+        key = self._header_key(header)
+        with self._verified_lock:
+            return key in self._verified_headers
+
+    def remember(self, header: str) -> None:
+        key = self._header_key(header)
+        with self._verified_lock:
+            if len(self._verified_headers) >= 128:
+                self._verified_headers.clear()
+            self._verified_headers.add(key)
 
 
 def load_auth_config(path: Optional[str]) -> Optional[AuthConfig]:
@@ -144,10 +182,61 @@ def resolve_listen_host(host: str, prefer_ipv6: bool) -> str:
     raise ValueError("IPv6 模式下请提供合法的 IPv6 地址 (例如 ::)")
 
 
+def _generate_cert_in_process(days: int, subject: str, cert_path: str, key_path: str) -> bool:
+    """Generate the self-signed pair via the cryptography package if installed.
+
+    可选依赖：存在时省掉 openssl 子进程（fork/exec + 临时参数解析约百毫秒），
+    不存在时返回 False 走原有 openssl 路径。
+    """
+    try:
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+    except ImportError:
+        return False
+
+    common_name = "localhost"
+    for part in (subject or "").split("/"):
+        if part.startswith("CN="):
+            common_name = part[3:] or common_name
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.now(timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + timedelta(days=days))
+        .sign(key, hashes.SHA256())
+    )
+    with open(key_path, "wb") as fp:
+        fp.write(
+            key.private_bytes(
+                encoding=serialization.Encoding.PEM,
+                format=serialization.PrivateFormat.TraditionalOpenSSL,
+                encryption_algorithm=serialization.NoEncryption(),
+            )
+        )
+    with open(cert_path, "wb") as fp:
+        fp.write(cert.public_bytes(serialization.Encoding.PEM))
+    return True
+
+
 def generate_self_signed_cert(days: int, subject: str, openssl_bin: Optional[str] = None) -> tuple[str, str, str]:
+    import shutil  # 仅 SSL 路径需要，延迟加载
+
     temp_dir = tempfile.mkdtemp(prefix="fn-scheduler-ssl-")
     cert_path = os.path.join(temp_dir, "cert.pem")
     key_path = os.path.join(temp_dir, "key.pem")
+    try:
+        if _generate_cert_in_process(days, subject, cert_path, key_path):
+            return cert_path, key_path, temp_dir
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning("cryptography 生成证书失败，回退 openssl: %s", exc)
     cmd = [
         openssl_bin or os.environ.get("SCHEDULER_OPENSSL_BIN", "openssl"),
         "req",
@@ -195,27 +284,80 @@ def time_now() -> datetime:
 def isoformat(dt: Optional[datetime]) -> Optional[str]:
     if dt is None:
         return None
-    # 直接用本地时间的 ISO 格式
-    return dt.replace(microsecond=0).isoformat(sep=' ')
+    if dt.tzinfo is not None:
+        return dt.replace(microsecond=0).isoformat(sep=' ')
+    # 无时区的本地时间直接按字段拼接，省去 replace() 的中间对象和 isoformat 的通用分支
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
 
 
-def parse_iso(value: Optional[str]) -> Optional[datetime]:
-    if not value:
-        return None
+@lru_cache(maxsize=4096)
+def _parse_iso_cached(value: str) -> Optional[datetime]:
     try:
-        # 兼容带空格的本地时间字符串
-        dt = datetime.fromisoformat(value.replace('T', ' '))
-        # 如果是带时区的，转为本地无时区
-        if dt.tzinfo is not None:
-            dt = dt.astimezone().replace(tzinfo=None)
-        return dt
+        # fromisoformat 本身接受 'T' 和空格分隔，直接解析免去字符串拷贝
+        dt = datetime.fromisoformat(value)
     except ValueError:
+        try:
+            # 兼容旧版本不认识的 'Z' 后缀等写法
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00").replace("T", " "))
+        except ValueError:
+            return None
+    # 如果是带时区的，转为本地无时区（本模块写入的值从不带时区）
+    if dt.tzinfo is not None:
+        dt = dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+def parse_iso(value: Optional[str]) -> Optional[datetime]:
+    """解析本模块写出的时间串；datetime 不可变，缓存命中直接复用同一对象。
+
+    同一个 last_condition_check_at/next_run_at 字符串在事件循环的每个
+    tick 都会被重复解析，LRU 缓存把热路径降为一次字典查找。
+    """
+    if not value:
         return None
+    return _parse_iso_cached(value)
+
+
+@lru_cache(maxsize=4096)
+def _iso_to_ts(value: str) -> Optional[float]:
+    """时间串到 epoch 秒的缓存映射，调度循环用浮点比较代替 timedelta。"""
+    dt = _parse_iso_cached(value)
+    return None if dt is None else dt.timestamp()
+
+
+# pwd/grp 枚举在真实部署中可能经由 NSS 走远端目录服务，按 TTL 缓存结果
+_ACCOUNT_CACHE_TTL = 30.0
+_ACCOUNT_CACHE: Optional[tuple[float, List[str], frozenset]] = None
+_ACCOUNT_CACHE_LOCK = threading.Lock()
+
+
+def _invalidate_account_cache() -> None:
+    global _ACCOUNT_CACHE
+    with _ACCOUNT_CACHE_LOCK:
+        _ACCOUNT_CACHE = None
+    with _ACCOUNT_RESOLVE_LOCK:
+        _ACCOUNT_RESOLVE_CACHE.clear()
+
+
+def _account_cache_entry() -> tuple[float, List[str], frozenset]:
+    global _ACCOUNT_CACHE
+    with _ACCOUNT_CACHE_LOCK:
+        cached = _ACCOUNT_CACHE
+        if cached is not None and time.monotonic() - cached[0] < _ACCOUNT_CACHE_TTL:
+            return cached
+        accounts = _enumerate_allowed_accounts()
+        entry = (time.monotonic(), accounts, frozenset(accounts))
+        _ACCOUNT_CACHE = entry
+        return entry
 
 
 def list_allowed_accounts() -> List[str]:
     """Return distinct account names whose primary or supplemental group is allowed."""
 
+    return _account_cache_entry()[1]
+
+
+def _enumerate_allowed_accounts() -> List[str]:
     if not POSIX_ACCOUNT_SUPPORT:
         return [DEFAULT_ACCOUNT_NAME] if DEFAULT_ACCOUNT_NAME else []
 
@@ -242,8 +384,33 @@ def list_allowed_accounts() -> List[str]:
     return sorted(accounts)
 
 
+# uid/gid/home/附加组解析同样可能打到远端 NSS，按账号缓存几分钟
+_ACCOUNT_RESOLVE_TTL = 300.0
+_ACCOUNT_RESOLVE_CACHE: Dict[str, tuple[float, tuple[int, int, str, tuple[int, ...]]]] = {}
+_ACCOUNT_RESOLVE_LOCK = threading.Lock()
+
+
+def _resolve_account(account: str) -> tuple[int, int, str, tuple[int, ...]]:
+    """Resolve (uid, gid, home, supplemental_gids); raises KeyError for unknown accounts."""
+    now = time.monotonic()
+    with _ACCOUNT_RESOLVE_LOCK:
+        cached = _ACCOUNT_RESOLVE_CACHE.get(account)
+        if cached is not None and now - cached[0] < _ACCOUNT_RESOLVE_TTL:
+            return cached[1]
+    pw_record = pwd.getpwnam(account)  # type: ignore[attr-defined]
+    supplemental: List[int] = []
+    try:
+        supplemental = [entry.gr_gid for entry in grp.getgrall() if account in entry.gr_mem]  # type: ignore[attr-defined]
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning("获取账号 %s 附加组失败: %s", account, exc)
+    record = (pw_record.pw_uid, pw_record.pw_gid, pw_record.pw_dir, tuple(supplemental))
+    with _ACCOUNT_RESOLVE_LOCK:
+        _ACCOUNT_RESOLVE_CACHE[account] = (now, record)
+    return record
+
+
 def ensure_account_allowed(account: str) -> str:
-    allowed = list_allowed_accounts()
+    _, allowed, allowed_set = _account_cache_entry()
     if not allowed:
         if POSIX_ACCOUNT_SUPPORT:
             raise ValueError("系统中未找到属于 0/1000/1001 组的账号")
@@ -253,7 +420,7 @@ def ensure_account_allowed(account: str) -> str:
         if account and account != default_account:
             raise ValueError(f"Windows 环境仅支持使用账号 {default_account}")
         return default_account
-    if account not in allowed:
+    if account not in allowed_set:
         raise ValueError("账号必须属于系统组 0/1000/1001 的成员")
     return account
 
@@ -283,6 +450,8 @@ class CronExpression:
             expanded, wildcard = self._expand_field(part, spec)
             self.fields.append(expanded)
             self._wildcards.append(wildcard)
+        # 每个字段打包为 int 位图，_matches 用位测试代替列表成员查找
+        self._masks: List[int] = [sum(1 << v for v in field) for field in self.fields]
 
     def _expand_field(self, token: str, spec: tuple) -> tuple[List[int], bool]:
         name, min_value, max_value, span = spec
@@ -302,10 +471,8 @@ class CronExpression:
             expanded = self._expand_range(item, min_value, max_value)
             if not expanded:
                 raise ValueError(f"Invalid {name} segment: {item}")
-            start_val = expanded[0]
-            for value in expanded:
-                if (value - start_val) % step == 0:
-                    values.add(value)
+            # expanded 是连续升序区间，步进过滤等价于按下标切片
+            values.update(expanded[::step] if step > 1 else expanded)
             wildcard = wildcard or (original_item == "*")
         if not values:
             raise ValueError(f"No values computed for {name}")
@@ -334,33 +501,65 @@ class CronExpression:
         raise ValueError("Unsupported cron token")
 
     def next_after(self, moment: datetime) -> datetime:
-        base = moment.replace(second=0, microsecond=0)
-        candidate = base
-        for _ in range(MAX_LOOKAHEAD_MINUTES):
-            candidate += timedelta(minutes=1)
-            if self._matches(candidate):
-                return candidate
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # 按 月 -> 日 -> 时 -> 分 逐字段跳跃，而不是逐分钟扫描：
+        # 稀疏表达式（如每月一次）从数十万次迭代降到几十次
+        horizon = candidate + timedelta(minutes=MAX_LOOKAHEAD_MINUTES)
+        while candidate <= horizon:
+            if not (self._masks[3] >> candidate.month) & 1:
+                if candidate.month == 12:
+                    candidate = candidate.replace(year=candidate.year + 1, month=1, day=1, hour=0, minute=0)
+                else:
+                    candidate = candidate.replace(month=candidate.month + 1, day=1, hour=0, minute=0)
+                continue
+            if self._calendar_ok(candidate):
+                found = self._next_time_in_day(candidate)
+                if found is not None:
+                    return found
+            candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
         raise ValueError("Unable to compute next run within lookahead window")
 
+    def _next_time_in_day(self, candidate: datetime) -> Optional[datetime]:
+        """Return the first matching hour/minute at or after ``candidate`` on its day."""
+        minutes, hours = self.fields[0], self.fields[1]
+        for hour in hours[bisect_left(hours, candidate.hour):]:
+            if hour == candidate.hour:
+                idx = bisect_left(minutes, candidate.minute)
+                if idx < len(minutes):
+                    return candidate.replace(hour=hour, minute=minutes[idx])
+            else:
+                return candidate.replace(hour=hour, minute=minutes[0])
+        return None
+
     def _matches(self, candidate: datetime) -> bool:
-        minute, hour = candidate.minute, candidate.hour
-        day, month = candidate.day, candidate.month
-        weekday = candidate.weekday()
-        dom_match = day in self.fields[2]
-        dow_match = weekday in self.fields[4]
+        masks = self._masks
+        if not (masks[0] >> candidate.minute) & 1:
+            return False
+        if not (masks[1] >> candidate.hour) & 1:
+            return False
+        if not (masks[3] >> candidate.month) & 1:
+            return False
+        return self._calendar_ok(candidate)
+
+    def _calendar_ok(self, candidate: datetime) -> bool:
+        dom_match = bool((self._masks[2] >> candidate.day) & 1)
+        dow_match = bool((self._masks[4] >> candidate.weekday()) & 1)
         dom_wildcard = self._wildcards[2]
         dow_wildcard = self._wildcards[4]
 
         if dom_wildcard and dow_wildcard:
-            calendar_ok = True
-        elif dom_wildcard:
-            calendar_ok = dow_match
-        elif dow_wildcard:
-            calendar_ok = dom_match
-        else:
-            calendar_ok = dom_match or dow_match
+            return True
+        if dom_wildcard:
+            return dow_match
+        if dow_wildcard:
+            return dom_match
+        return dom_match or dow_match
 
-        return minute in self.fields[0] and hour in self.fields[1] and month in self.fields[3] and calendar_ok
+
+@lru_cache(maxsize=1024)
+def _parse_cron(expression: str) -> CronExpression:
+    """Parse-and-cache cron expressions; instances are immutable after __init__."""
+    return CronExpression(expression)
 
 
 ###############################################################################
@@ -368,20 +567,50 @@ class CronExpression:
 ###############################################################################
 
 class Database:
+    # 后台写线程批量提交的节奏：最多攒 _WRITE_BATCH_MAX 条或等 _WRITE_BATCH_WINDOW 秒
+    _WRITE_BATCH_MAX = 64
+    _WRITE_BATCH_WINDOW = 0.05
+    # WAL 模式下读连接可并行，池大小限制空闲连接总量
+    _READ_POOL_MAX = 8
+
     def __init__(self, path: str):
         self.path = path
         db_dir = os.path.dirname(path)
         if db_dir:
             os.makedirs(db_dir, exist_ok=True)
-        self._lock = threading.RLock()
-        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        # 所有临界区都只获取一次锁（无重入），普通 Lock 比 RLock 便宜
+        self._lock = threading.Lock()
+        # cached_statements 放大 sqlite3 内建的 prepared-statement 缓存，
+        # 反复执行的 DML 不再每次走 sqlite3_prepare_v2；
+        # isolation_level=None 关闭模块的隐式 BEGIN，单条 DML 走真正的
+        # autocommit，多步写显式包在 BEGIN IMMEDIATE/COMMIT 里
+        self._conn = sqlite3.connect(
+            self.path, check_same_thread=False, cached_statements=256, isolation_level=None
+        )
         self._conn.row_factory = sqlite3.Row
+        self._read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._read_pool_lock = threading.Lock()
+        self._read_pool_size = 0
         self._setup()
+        self._write_queue: "queue.Queue[Optional[tuple[str, tuple]]]" = queue.Queue()
+        self._writer_stop = threading.Event()
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True)
+        self._writer.start()
 
     def _setup(self) -> None:
         with self._lock:
             cur = self._conn.cursor()
-            cur.execute("PRAGMA journal_mode=WAL;")
+            # 内存库不支持 WAL（也无 fsync 可省），仅对磁盘库启用
+            if self.path != ":memory:":
+                cur.execute("PRAGMA journal_mode=WAL;")
+                cur.execute("PRAGMA synchronous=NORMAL;")
+                cur.execute("PRAGMA wal_autocheckpoint=1000;")
+                cur.execute("PRAGMA mmap_size=268435456;")
+            cur.execute("PRAGMA busy_timeout=5000;")
+            cur.execute("PRAGMA temp_store=MEMORY;")
+            cur.execute("PRAGMA cache_size=-20000;")
+            # 事务都很小，禁止把脏页提前刷盘换取更平稳的写延迟
+            cur.execute("PRAGMA cache_spill=0;")
             cur.execute("PRAGMA foreign_keys=ON;")
             cur.execute("PRAGMA user_version;")
             (version,) = cur.fetchone()
@@ -397,9 +626,76 @@ class Database:
                         raise
                 cur.execute("PRAGMA user_version=2;")
                 version = 2
+            if version < 3:
+                cur.executescript(
+                    """
+                    CREATE INDEX IF NOT EXISTS idx_tasks_active_next
+                        ON tasks(next_run_at) WHERE is_active=1;
+                    CREATE INDEX IF NOT EXISTS idx_task_results_running
+                        ON task_results(task_id) WHERE status='running';
+                    """
+                )
+                cur.execute("PRAGMA user_version=3;")
+                version = 3
+            if version < 4:
+                # 调度轮询按 (trigger_type, next_run_at)/(trigger_type, event_type)
+                # 过滤，复合部分索引让过滤+排序走单次范围扫描
+                cur.executescript(
+                    """
+                    DROP INDEX IF EXISTS idx_tasks_active_next;
+                    CREATE INDEX IF NOT EXISTS idx_tasks_due
+                        ON tasks(trigger_type, next_run_at) WHERE is_active=1;
+                    CREATE INDEX IF NOT EXISTS idx_tasks_event
+                        ON tasks(trigger_type, event_type) WHERE is_active=1;
+                    ANALYZE;
+                    """
+                )
+                cur.execute("PRAGMA user_version=4;")
+                version = 4
+            if version < 5:
+                # 依赖关系归一化到连接表，依赖检查改为 SQL 级别完成；
+                # pre_task_ids JSON 列保留作为 API 读取来源
+                cur.executescript(
+                    """
+                    CREATE TABLE IF NOT EXISTS task_dependencies (
+                        task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+                        pre_task_id INTEGER NOT NULL,
+                        PRIMARY KEY (task_id, pre_task_id)
+                    ) WITHOUT ROWID;
+                    CREATE INDEX IF NOT EXISTS idx_deps_pre
+                        ON task_dependencies(pre_task_id);
+                    """
+                )
+                cur.execute("SELECT id, pre_task_ids FROM tasks WHERE pre_task_ids NOT IN ('', '[]')")
+                backfill: List[Tuple[int, int]] = []
+                for task_id, raw_pre in cur.fetchall():
+                    try:
+                        deps = json.loads(raw_pre)
+                    except (TypeError, ValueError):
+                        continue
+                    backfill.extend((task_id, int(dep)) for dep in deps)
+                if backfill:
+                    cur.executemany(
+                        "INSERT OR IGNORE INTO task_dependencies(task_id, pre_task_id) VALUES (?, ?)",
+                        backfill,
+                    )
+                cur.execute("PRAGMA user_version=5;")
+                version = 5
+            if version < 6:
+                # fetch_due_tasks/next_scheduled_run 都带 next_run_at IS NOT NULL，
+                # 把谓词并入部分索引后 B 树只覆盖真正待调度的行
+                cur.executescript(
+                    """
+                    DROP INDEX IF EXISTS idx_tasks_due;
+                    CREATE INDEX IF NOT EXISTS idx_tasks_due
+                        ON tasks(trigger_type, next_run_at)
+                        WHERE is_active=1 AND next_run_at IS NOT NULL;
+                    """
+                )
+                cur.execute("PRAGMA user_version=6;")
+                version = 6
             if version < DB_LATEST_VERSION:
                 cur.execute(f"PRAGMA user_version={DB_LATEST_VERSION};")
-            self._conn.commit()
 
         try:
             with self._lock:
@@ -420,7 +716,6 @@ class Database:
                         );
                         """
                     )
-                    self._conn.commit()
         except Exception:
             logger.exception("Failed to create templates tables")
             pass
@@ -458,7 +753,23 @@ class Database:
             );
 
             CREATE INDEX IF NOT EXISTS idx_task_results_task ON task_results(task_id, started_at DESC);
-            
+
+            CREATE INDEX IF NOT EXISTS idx_tasks_due
+                ON tasks(trigger_type, next_run_at)
+                WHERE is_active=1 AND next_run_at IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS idx_tasks_event
+                ON tasks(trigger_type, event_type) WHERE is_active=1;
+            CREATE INDEX IF NOT EXISTS idx_task_results_running
+                ON task_results(task_id) WHERE status='running';
+
+            CREATE TABLE IF NOT EXISTS task_dependencies (
+                task_id INTEGER NOT NULL REFERENCES tasks(id) ON DELETE CASCADE,
+                pre_task_id INTEGER NOT NULL,
+                PRIMARY KEY (task_id, pre_task_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_deps_pre
+                ON task_dependencies(pre_task_id);
+
             CREATE TABLE IF NOT EXISTS templates (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 key TEXT NOT NULL UNIQUE,
@@ -471,28 +782,164 @@ class Database:
         )
 
     def close(self) -> None:
+        self._writer_stop.set()
+        self._write_queue.put(None)  # 唤醒写线程以便尽快退出
+        self._writer.join(timeout=5)
+        while True:
+            try:
+                self._read_pool.get_nowait().close()
+            except queue.Empty:
+                break
         with self._lock:
+            try:
+                # 让 SQLite 按运行期查询画像刷新统计信息，下次启动规划更优
+                self._conn.execute("PRAGMA optimize;")
+            except sqlite3.Error:
+                pass
             self._conn.close()
 
+    # Connection pooling --------------------------------------------------
+    @contextmanager
+    def _write_txn(self):
+        """Run a multi-statement mutation inside BEGIN IMMEDIATE .. COMMIT.
+
+        写连接是 autocommit 的（isolation_level=None），单条 DML 无需事务；
+        多步写必须显式开事务以保证原子性并把 fsync 合并为一次。
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except Exception:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    @contextmanager
+    def _read_conn(self):
+        """Borrow a read-only connection from the pool.
+
+        WAL 模式下读连接不会被写阻塞；:memory: 库无法跨连接共享，
+        退回到加锁复用写连接。
+        """
+        if self.path == ":memory:":
+            with self._lock:
+                yield self._conn
+            return
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            with self._read_pool_lock:
+                can_create = self._read_pool_size < self._READ_POOL_MAX
+                if can_create:
+                    self._read_pool_size += 1
+            if can_create:
+                try:
+                    conn = self._new_read_conn()
+                except Exception:
+                    # 建连失败（fd 耗尽、磁盘错误）要回退名额，
+                    # 否则池容量被永久吃掉，耗尽后所有读请求挂死在 get()
+                    with self._read_pool_lock:
+                        self._read_pool_size -= 1
+                    raise
+            else:
+                conn = self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+
+    def _new_read_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, cached_statements=256, isolation_level=None
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA busy_timeout=5000;")
+        conn.execute("PRAGMA cache_size=-20000;")
+        conn.execute("PRAGMA temp_store=MEMORY;")
+        conn.execute("PRAGMA foreign_keys=ON;")
+        return conn
+
+    # Deferred write machinery -------------------------------------------
+    def _enqueue_write(self, sql: str, params: tuple) -> None:
+        """Queue a fire-and-forget DML for the background writer.
+
+        仅用于不需要读取返回值、允许落盘延迟 ~50ms 的写操作
+        （如任务结果收尾、last_run 更新），多条写合并为一次 commit。
+        """
+        self._write_queue.put((sql, params))
+
+    def _writer_loop(self) -> None:
+        while True:
+            try:
+                item = self._write_queue.get(timeout=0.2)
+            except queue.Empty:
+                if self._writer_stop.is_set():
+                    return
+                continue
+            batch: List[tuple[str, tuple]] = []
+            if item is not None:
+                batch.append(item)
+            deadline = time.monotonic() + self._WRITE_BATCH_WINDOW
+            while len(batch) < self._WRITE_BATCH_MAX:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._write_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is not None:
+                    batch.append(item)
+            if batch:
+                self._flush_writes(batch)
+            if self._writer_stop.is_set() and self._write_queue.empty():
+                return
+
+    def _flush_writes(self, batch: List[tuple[str, tuple]]) -> None:
+        # 按 SQL 模板聚组，一次事务提交整批
+        grouped: Dict[str, List[tuple]] = {}
+        for sql, params in batch:
+            grouped.setdefault(sql, []).append(params)
+        try:
+            with self._write_txn() as conn:
+                for sql, rows in grouped.items():
+                    conn.executemany(sql, rows)
+        except Exception:
+            logger.exception("Failed to flush %d deferred writes", len(batch))
+
     # Utility methods -----------------------------------------------------
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _parse_pre_task_ids(raw: str) -> tuple:
+        """Decode a non-empty pre_task_ids column, memoized by raw string.
+
+        同一任务每个调度 tick 都会被重复取出，字符串不变则直接命中缓存；
+        返回 tuple 以保证缓存值只读。
+        """
+        return tuple(json.loads(raw))
+
     def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        # 所有取出 task 行的 SELECT 都带下面这几列，直接按键索引即可
         data = dict(row)
-        data["is_active"] = bool(data.get("is_active"))
-        data["condition_interval"] = int(data.get("condition_interval", 60))
-        data["pre_task_ids"] = json.loads(data.get("pre_task_ids") or "[]")
-        data["event_type"] = data.get("event_type") or EVENT_TYPE_SCRIPT
+        data["is_active"] = bool(data["is_active"])
+        data["condition_interval"] = int(data["condition_interval"] or 60)
+        raw_pre = data["pre_task_ids"]
+        # 绝大多数任务无前置依赖，常量 '[]' 不值得进 JSON 解析器
+        data["pre_task_ids"] = [] if not raw_pre or raw_pre == "[]" else list(self._parse_pre_task_ids(raw_pre))
+        data["event_type"] = data["event_type"] or EVENT_TYPE_SCRIPT
         return data
 
     # Templates management ----------------------------------------------
     def list_templates(self) -> List[Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute("SELECT * FROM templates ORDER BY id ASC")
-            rows = [dict(row) for row in cur.fetchall()]
-        return rows
+        with self._read_conn() as conn:
+            cur = conn.execute("SELECT * FROM templates ORDER BY id ASC")
+            rows = cur.fetchall()
+        return [dict(row) for row in rows]
 
     def get_template(self, template_id: int) -> Optional[Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute("SELECT * FROM templates WHERE id=?", (template_id,))
+        with self._read_conn() as conn:
+            cur = conn.execute("SELECT * FROM templates WHERE id=?", (template_id,))
             row = cur.fetchone()
         return dict(row) if row else None
 
@@ -511,8 +958,9 @@ class Database:
             key = base
             idx = 1
             while True:
-                cur = self._conn.execute("SELECT COUNT(1) FROM templates WHERE key=?", (key,))
-                (count,) = cur.fetchone()
+                with self._read_conn() as conn:
+                    cur = conn.execute("SELECT COUNT(1) FROM templates WHERE key=?", (key,))
+                    (count,) = cur.fetchone()
                 if count == 0:
                     break
                 idx += 1
@@ -523,7 +971,6 @@ class Database:
                 "INSERT INTO templates (key, name, script_body, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
                 (key, name, script_body, now_iso, now_iso),
             )
-            self._conn.commit()
             tid = cur.lastrowid
         return self.get_template(tid)  # type: ignore
 
@@ -544,61 +991,65 @@ class Database:
                 "UPDATE templates SET key=?, name=?, script_body=?, updated_at=? WHERE id=?",
                 (key, name, script_body, updated_at, template_id),
             )
-            self._conn.commit()
         return self.get_template(template_id)
 
     def delete_template(self, template_id: int) -> bool:
         with self._lock:
             cur = self._conn.execute("DELETE FROM templates WHERE id=?", (template_id,))
-            self._conn.commit()
             return cur.rowcount > 0
 
     def import_templates(self, mapping: Dict[str, Dict[str, str]]) -> Dict[str, int]:
         """Import templates from a mapping like templates.json (key -> {name, script_body}).
         Returns summary counts: inserted, updated"""
-        inserted = 0
-        updated = 0
         now = isoformat(time_now())
-        with self._lock:
+        # 单事务批量写入，避免每条 DML 触发一次 fsync
+        with self._write_txn() as conn:
+            cur = conn.execute("SELECT key FROM templates")
+            existing_keys = {row[0] for row in cur.fetchall()}
+            to_insert: List[tuple] = []
+            to_update: List[tuple] = []
             for key, meta in (mapping or {}).items():
                 name = (meta.get("name") or key).strip()
                 script_body = (meta.get("script_body") or "").strip()
                 if not script_body:
                     continue
-                cur = self._conn.execute("SELECT id FROM templates WHERE key=?", (key,))
-                row = cur.fetchone()
-                if row:
-                    self._conn.execute(
-                        "UPDATE templates SET name=?, script_body=?, updated_at=? WHERE key=?",
-                        (name, script_body, now, key),
-                    )
-                    updated += 1
+                if key in existing_keys:
+                    to_update.append((name, script_body, now, key))
                 else:
-                    self._conn.execute(
-                        "INSERT INTO templates (key, name, script_body, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
-                        (key, name, script_body, now, now),
-                    )
-                    inserted += 1
-            self._conn.commit()
-        return {"inserted": inserted, "updated": updated}
+                    to_insert.append((key, name, script_body, now, now))
+            if to_insert:
+                conn.executemany(
+                    "INSERT INTO templates (key, name, script_body, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    to_insert,
+                )
+            if to_update:
+                conn.executemany(
+                    "UPDATE templates SET name=?, script_body=?, updated_at=? WHERE key=?",
+                    to_update,
+                )
+        return {"inserted": len(to_insert), "updated": len(to_update)}
 
     def export_templates(self) -> Dict[str, Dict[str, str]]:
-        out: Dict[str, Dict[str, str]] = {}
-        with self._lock:
-            cur = self._conn.execute("SELECT key, name, script_body FROM templates ORDER BY id ASC")
-            for row in cur.fetchall():
-                out[row[0]] = {"name": row[1], "script_body": row[2]}
-        return out
+        with self._read_conn() as conn:
+            cur = conn.execute("SELECT key, name, script_body FROM templates ORDER BY id ASC")
+            rows = cur.fetchall()
+        return {row[0]: {"name": row[1], "script_body": row[2]} for row in rows}
 
     def list_tasks(self) -> List[Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute("SELECT * FROM tasks ORDER BY id ASC")
-            rows = [self._row_to_dict(row) for row in cur.fetchall()]
-        return rows
+        with self._read_conn() as conn:
+            cur = conn.execute("SELECT * FROM tasks ORDER BY id ASC")
+            rows = cur.fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def count_tasks(self) -> int:
+        with self._read_conn() as conn:
+            cur = conn.execute("SELECT COUNT(1) FROM tasks")
+            (count,) = cur.fetchone()
+        return int(count)
 
     def get_task(self, task_id: int) -> Optional[Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute("SELECT * FROM tasks WHERE id=?", (task_id,))
+        with self._read_conn() as conn:
+            cur = conn.execute("SELECT * FROM tasks WHERE id=?", (task_id,))
             row = cur.fetchone()
         return self._row_to_dict(row) if row else None
 
@@ -607,8 +1058,8 @@ class Database:
         task = self._prepare_task_payload(payload, is_update=False)
         task["created_at"] = now
         task["updated_at"] = now
-        with self._lock:
-            cur = self._conn.execute(
+        with self._write_txn() as conn:
+            cur = conn.execute(
                 """
                 INSERT INTO tasks (
                     name, account, trigger_type, schedule_expression, condition_script,
@@ -636,13 +1087,20 @@ class Database:
                 ),
             )
             task_id = cur.lastrowid
-            self._conn.commit()
+            self._replace_dependencies(task_id, task["pre_task_ids"])
         return self.get_task(task_id)  # type: ignore
 
+    # 仅触及这些列的更新（如启停开关）走轻量路径，跳过完整校验
+    _LIGHT_UPDATE_FIELDS = frozenset(
+        {"is_active", "last_run_at", "next_run_at", "last_condition_check_at"}
+    )
+
     def update_task(self, task_id: int, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
             existing = self.get_task(task_id)
             if not existing:
                 return None
+            if payload and set(payload) <= self._LIGHT_UPDATE_FIELDS:
+                return self._update_task_light(task_id, payload)
             # 检查 Cron 表达式是否变更，变更则强制 next_run_at 重新计算
             old_expr = existing.get("schedule_expression")
             new_expr = payload.get("schedule_expression", old_expr)
@@ -655,8 +1113,8 @@ class Database:
                 payload["next_run_at"] = None  # 让 _prepare_task_payload 自动计算
             task = self._prepare_task_payload({**existing, **payload}, is_update=True)
             task["updated_at"] = isoformat(time_now())
-            with self._lock:
-                self._conn.execute(
+            with self._write_txn() as conn:
+                conn.execute(
                     """
                     UPDATE tasks SET
                         name=?, account=?, trigger_type=?, schedule_expression=?, condition_script=?,
@@ -682,13 +1140,55 @@ class Database:
                         task_id,
                     ),
                 )
-                self._conn.commit()
+                self._replace_dependencies(task_id, task["pre_task_ids"])
             return self.get_task(task_id)
 
+    def _update_task_light(self, task_id: int, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update state-only columns without re-validating account/cron/script."""
+        assignments = ["updated_at=?"]
+        values: List[Any] = [isoformat(time_now())]
+        for field in ("is_active", "last_run_at", "next_run_at", "last_condition_check_at"):
+            if field in payload:
+                assignments.append(f"{field}=?")
+                value = payload[field]
+                values.append((1 if value else 0) if field == "is_active" else value)
+        values.append(task_id)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE tasks SET {', '.join(assignments)} WHERE id=?", values
+            )
+        return self.get_task(task_id)
+
+    def _replace_dependencies(self, task_id: int, pre_task_ids: List[int]) -> None:
+        """Rewrite the join-table rows for one task (caller holds the lock/txn)."""
+        self._conn.execute("DELETE FROM task_dependencies WHERE task_id=?", (task_id,))
+        if pre_task_ids:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO task_dependencies(task_id, pre_task_id) VALUES (?, ?)",
+                [(task_id, int(dep)) for dep in pre_task_ids],
+            )
+
+    def dependencies_met(self, task_id: int) -> bool:
+        """SQL 级依赖检查：任一前置任务最近一次结果不是 success 即未满足。"""
+        with self._read_conn() as conn:
+            cur = conn.execute(
+                """
+                SELECT 1 FROM task_dependencies d
+                WHERE d.task_id = ?
+                  AND COALESCE(
+                        (SELECT r.status FROM task_results r
+                         WHERE r.task_id = d.pre_task_id
+                         ORDER BY r.id DESC LIMIT 1),
+                        '') <> 'success'
+                LIMIT 1
+                """,
+                (task_id,),
+            )
+            return cur.fetchone() is None
+
     def delete_task(self, task_id: int) -> bool:
         with self._lock:
             cur = self._conn.execute("DELETE FROM tasks WHERE id=?", (task_id,))
-            self._conn.commit()
             return cur.rowcount > 0
 
     def record_result_start(self, task_id: int, trigger_reason: str) -> int:
@@ -701,30 +1201,70 @@ class Database:
                 """,
                 (task_id, trigger_reason, now),
             )
-            self._conn.commit()
             return cur.lastrowid
 
-    def finalize_result(self, result_id: int, status: str, log_text: str) -> None:
+    def record_result_starts(self, entries: List[Tuple[int, str]]) -> List[int]:
+        """Insert running-result rows for a batch of (task_id, trigger_reason).
+
+        同一 tick 触发多个任务时合并为一个事务，fsync 只付一次。
+        """
+        if not entries:
+            return []
         now = isoformat(time_now())
-        with self._lock:
-            self._conn.execute(
-                "UPDATE task_results SET status=?, finished_at=?, log=? WHERE id=?",
-                (status, now, log_text, result_id),
-            )
-            self._conn.commit()
+        result_ids: List[int] = []
+        with self._write_txn() as conn:
+            for task_id, trigger_reason in entries:
+                cur = conn.execute(
+                    """
+                    INSERT INTO task_results(task_id, status, trigger_reason, started_at)
+                    VALUES (?, 'running', ?, ?)
+                    """,
+                    (task_id, trigger_reason, now),
+                )
+                result_ids.append(cur.lastrowid)
+        return result_ids
 
-    def fetch_results(self, task_id: int, limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute(
-                "SELECT * FROM task_results WHERE task_id=? ORDER BY started_at DESC LIMIT ? OFFSET ?",
-                (task_id, limit, offset),
-            )
-            rows = [dict(row) for row in cur.fetchall()]
-        return rows
+    def fetch_results(
+        self,
+        task_id: int,
+        limit: int = 50,
+        offset: int = 0,
+        before: Optional[str] = None,
+        before_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Fetch result history, newest first.
+
+        ``before``/``before_id`` 为上一页最后一行的 (started_at, id) 复合游标
+        （keyset 分页，索引直达）。started_at 只有秒级精度且同一轮批量落库的
+        行共享同一时间戳，单独用它做游标会把同秒的行整页跳掉，必须带 id 破平；
+        ``offset`` 仅作为旧调用方的兼容回退，历史很长时会线性扫描丢弃。
+        """
+        with self._read_conn() as conn:
+            if before and before_id is not None:
+                cur = conn.execute(
+                    "SELECT * FROM task_results WHERE task_id=? AND "
+                    "(started_at < ? OR (started_at = ? AND id < ?)) "
+                    "ORDER BY started_at DESC, id DESC LIMIT ?",
+                    (task_id, before, before, before_id, limit),
+                )
+            elif before:
+                cur = conn.execute(
+                    "SELECT * FROM task_results WHERE task_id=? AND started_at < ? "
+                    "ORDER BY started_at DESC, id DESC LIMIT ?",
+                    (task_id, before, limit),
+                )
+            else:
+                cur = conn.execute(
+                    "SELECT * FROM task_results WHERE task_id=? "
+                    "ORDER BY started_at DESC, id DESC LIMIT ? OFFSET ?",
+                    (task_id, limit, offset),
+                )
+            rows = cur.fetchall()
+        return [dict(row) for row in rows]
 
     def fetch_result(self, task_id: int, result_id: int) -> Optional[Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._read_conn() as conn:
+            cur = conn.execute(
                 "SELECT * FROM task_results WHERE task_id=? AND id=?",
                 (task_id, result_id),
             )
@@ -740,81 +1280,224 @@ class Database:
                     "DELETE FROM task_results WHERE task_id=? AND id=?",
                     (task_id, result_id),
                 )
-            self._conn.commit()
             return cur.rowcount
 
     def get_latest_result(self, task_id: int) -> Optional[Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._read_conn() as conn:
+            cur = conn.execute(
                 "SELECT * FROM task_results WHERE task_id=? ORDER BY started_at DESC LIMIT 1",
                 (task_id,),
             )
             row = cur.fetchone()
         return dict(row) if row else None
 
-    def has_running_instance(self, task_id: int) -> bool:
-        with self._lock:
-            cur = self._conn.execute(
-                "SELECT COUNT(1) FROM task_results WHERE task_id=? AND status='running'",
-                (task_id,),
-            )
-            (count,) = cur.fetchone()
-        return count > 0
+    def get_latest_results(self, task_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch the most recent result row for each task id in one query."""
+        out: Dict[int, Dict[str, Any]] = {}
+        if not task_ids:
+            return out
+        rows: List[sqlite3.Row] = []
+        with self._read_conn() as conn:
+            # 分块保持在 SQLITE_MAX_VARIABLE_NUMBER 之下
+            for start in range(0, len(task_ids), 500):
+                chunk = task_ids[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cur = conn.execute(
+                    f"""
+                    SELECT r.* FROM task_results r
+                    JOIN (
+                        SELECT task_id, MAX(id) AS mid FROM task_results
+                        WHERE task_id IN ({placeholders}) GROUP BY task_id
+                    ) m ON r.id = m.mid
+                    """,
+                    chunk,
+                )
+                rows.extend(cur.fetchall())
+        for row in rows:
+            data = dict(row)
+            out[data["task_id"]] = data
+        return out
 
-    def update_last_run(self, task_id: int) -> None:
-        with self._lock:
-            self._conn.execute(
-                "UPDATE tasks SET last_run_at=?, updated_at=? WHERE id=?",
-                (isoformat(time_now()), isoformat(time_now()), task_id),
+    def get_tasks_bulk(self, task_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Fetch many tasks by id in one query (chunked under the bind-variable cap)."""
+        out: Dict[int, Dict[str, Any]] = {}
+        if not task_ids:
+            return out
+        with self._read_conn() as conn:
+            for start in range(0, len(task_ids), 500):
+                chunk = task_ids[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cur = conn.execute(
+                    f"SELECT * FROM tasks WHERE id IN ({placeholders})", chunk
+                )
+                for row in cur.fetchall():
+                    data = self._row_to_dict(row)
+                    out[data["id"]] = data
+        return out
+
+    def get_task_states_bulk(self, task_ids: List[int]) -> Dict[int, bool]:
+        """Map id -> is_active for the ids that exist; no heavy columns fetched."""
+        out: Dict[int, bool] = {}
+        if not task_ids:
+            return out
+        with self._read_conn() as conn:
+            for start in range(0, len(task_ids), 500):
+                chunk = task_ids[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cur = conn.execute(
+                    f"SELECT id, is_active FROM tasks WHERE id IN ({placeholders})", chunk
+                )
+                for task_id, is_active in cur.fetchall():
+                    out[task_id] = bool(is_active)
+        return out
+
+    def delete_tasks_bulk(self, task_ids: List[int]) -> int:
+        """Delete many tasks with one statement per 500-id chunk, one transaction total."""
+        if not task_ids:
+            return 0
+        deleted = 0
+        with self._write_txn() as conn:
+            for start in range(0, len(task_ids), 500):
+                chunk = task_ids[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cur = conn.execute(
+                    f"DELETE FROM tasks WHERE id IN ({placeholders})", chunk
+                )
+                deleted += cur.rowcount
+        return deleted
+
+    def set_active_bulk(self, task_ids: List[int], active: bool) -> None:
+        """Flip is_active for many tasks in one transaction."""
+        if not task_ids:
+            return
+        now = isoformat(time_now())
+        flag = 1 if active else 0
+        with self._write_txn() as conn:
+            for start in range(0, len(task_ids), 500):
+                chunk = task_ids[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                # 状态过滤下推到 SQL，已处于目标状态的行不产生写放大
+                conn.execute(
+                    f"UPDATE tasks SET is_active=?, updated_at=? "
+                    f"WHERE id IN ({placeholders}) AND is_active<>?",
+                    (flag, now, *chunk, flag),
+                )
+
+    def write_version(self) -> int:
+        """Monotonic change indicator: rows modified through the write connection.
+
+        所有写入都经由唯一的写连接（含后台写线程），total_changes 因此可以
+        充当零成本的「库是否变过」版本号，供响应缓存判断是否需要重建。
+        """
+        return self._conn.total_changes
+
+    def running_task_ids(self) -> List[int]:
+        """Task ids with an unfinished result row; used to rehydrate the engine's running set."""
+        with self._read_conn() as conn:
+            cur = conn.execute(
+                "SELECT DISTINCT task_id FROM task_results WHERE status='running'"
             )
-            self._conn.commit()
+            return [row[0] for row in cur.fetchall()]
+
+    def finalize_task_run(self, task_id: int, result_id: int, status: str, log_text: str) -> None:
+        """Finalize a result row and stamp the task's last run in one writer batch."""
+        now = isoformat(time_now())
+        self._enqueue_write(
+            "UPDATE task_results SET status=?, finished_at=?, log=? WHERE id=?",
+            (status, now, log_text, result_id),
+        )
+        self._enqueue_write(
+            "UPDATE tasks SET last_run_at=?, updated_at=? WHERE id=?",
+            (now, now, task_id),
+        )
 
     def schedule_next_run(self, task_id: int, expression: str, base: Optional[datetime] = None) -> Optional[str]:
         if not expression:
             return None
-        cron = CronExpression(expression)
+        cron = _parse_cron(expression)
         next_dt = cron.next_after(base or time_now())
         next_iso = isoformat(next_dt)
+        now = isoformat(time_now())
         with self._lock:
             self._conn.execute(
                 "UPDATE tasks SET next_run_at=?, updated_at=? WHERE id=?",
-                (next_iso, isoformat(time_now()), task_id),
+                (next_iso, now, task_id),
             )
-            self._conn.commit()
         return next_iso
 
-    def update_condition_check(self, task_id: int) -> None:
-        with self._lock:
-            self._conn.execute(
-                "UPDATE tasks SET last_condition_check_at=?, updated_at=? WHERE id=?",
-                (isoformat(time_now()), isoformat(time_now()), task_id),
-            )
-            self._conn.commit()
+    def bulk_update_condition_check(self, task_ids: List[int], moment: datetime) -> None:
+        """Stamp last_condition_check_at for many tasks with one commit."""
+        if not task_ids:
+            return
+        now = isoformat(moment)
+        with self._write_txn() as conn:
+            for start in range(0, len(task_ids), 500):
+                chunk = task_ids[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                conn.execute(
+                    f"UPDATE tasks SET last_condition_check_at=?, updated_at=? WHERE id IN ({placeholders})",
+                    (now, now, *chunk),
+                )
 
     def fetch_due_tasks(self, moment: datetime) -> List[Dict[str, Any]]:
-        with self._lock:
-            cur = self._conn.execute(
+        with self._read_conn() as conn:
+            cur = conn.execute(
                 """
-                SELECT * FROM tasks
+                SELECT id, name, account, trigger_type, schedule_expression,
+                       condition_interval, event_type, is_active, pre_task_ids,
+                       script_body, next_run_at
+                FROM tasks
                 WHERE trigger_type='schedule' AND is_active=1 AND next_run_at IS NOT NULL AND next_run_at <= ?
                 ORDER BY next_run_at ASC
                 """,
                 (isoformat(moment),),
             )
-            rows = [self._row_to_dict(row) for row in cur.fetchall()]
-        return rows
+            rows = cur.fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def next_scheduled_run(self) -> Optional[str]:
+        with self._read_conn() as conn:
+            cur = conn.execute(
+                "SELECT MIN(next_run_at) FROM tasks "
+                "WHERE trigger_type='schedule' AND is_active=1 AND next_run_at IS NOT NULL"
+            )
+            (value,) = cur.fetchone()
+        return value
+
+    def next_condition_due_seconds(self, moment: datetime) -> Optional[float]:
+        """Seconds until the earliest event-task condition check is due, if any."""
+        with self._read_conn() as conn:
+            cur = conn.execute(
+                "SELECT last_condition_check_at, condition_interval FROM tasks "
+                "WHERE trigger_type='event' AND is_active=1 AND event_type=?",
+                (EVENT_TYPE_SCRIPT,),
+            )
+            rows = cur.fetchall()
+        best: Optional[float] = None
+        for last_raw, interval in rows:
+            last_dt = parse_iso(last_raw)
+            if last_dt is None:
+                return 0.0
+            remaining = interval - (moment - last_dt).total_seconds()
+            if best is None or remaining < best:
+                best = remaining
+        return max(best, 0.0) if best is not None else None
 
     def fetch_event_tasks(self, event_type: Optional[str] = None) -> List[Dict[str, Any]]:
-        query = "SELECT * FROM tasks WHERE trigger_type='event' AND is_active=1"
+        query = (
+            "SELECT id, name, account, trigger_type, condition_script, condition_interval, "
+            "event_type, is_active, pre_task_ids, script_body, last_condition_check_at "
+            "FROM tasks WHERE trigger_type='event' AND is_active=1"
+        )
         params: List[Any] = []
         if event_type:
             query += " AND event_type=?"
             params.append(event_type)
         query += " ORDER BY id ASC"
-        with self._lock:
-            cur = self._conn.execute(query, params)
-            rows = [self._row_to_dict(row) for row in cur.fetchall()]
-        return rows
+        with self._read_conn() as conn:
+            cur = conn.execute(query, params)
+            rows = cur.fetchall()
+        return [self._row_to_dict(row) for row in rows]
 
     # Payload utilities ---------------------------------------------------
     def _prepare_task_payload(self, payload: Dict[str, Any], is_update: bool) -> Dict[str, Any]:
@@ -853,11 +1536,13 @@ class Database:
         if current_id is not None:
             current_id = int(current_id)
         cleaned: List[int] = []
+        seen: Set[int] = set()
         for tid in pre_task_ids:
             tid_int = int(tid)
             if current_id is not None and tid_int == current_id:
                 continue
-            if tid_int not in cleaned:
+            if tid_int not in seen:
+                seen.add(tid_int)
                 cleaned.append(tid_int)
         pre_task_ids = cleaned
 
@@ -867,7 +1552,7 @@ class Database:
         if trigger_type == "schedule":
             if not schedule_expression:
                 raise ValueError("定时任务需要 Cron 表达式")
-            cron = CronExpression(schedule_expression)
+            cron = _parse_cron(schedule_expression)
             if not is_update or not next_run_at:
                 next_run_at = isoformat(cron.next_after(time_now()))
             condition_script = None
@@ -905,29 +1590,53 @@ class Database:
 # Scheduler engine
 ###############################################################################
 
-class TaskRunner(threading.Thread):
-    def __init__(self, db: Database, task: Dict[str, Any], trigger_reason: str):
-        super().__init__(daemon=True)
+# 进程环境与 shell 前缀在服务生命周期内不变，启动时各算一次；
+# 每次 spawn 只做一次 dict 浅拷贝，省掉 os.environ 的逐项遍历
+_BASE_ENV: Dict[str, str] = dict(os.environ)
+_SHELL_PREFIX_NT: Tuple[str, ...] = (
+    "powershell",
+    "-NoLogo",
+    "-NonInteractive",
+    "-ExecutionPolicy",
+    "Bypass",
+    "-Command",
+)
+_SHELL_PREFIX_POSIX: Tuple[str, ...] = ("/bin/bash", "-c")
+
+
+class TaskRunner:
+    """Executes one task run; submitted to the engine's worker pool."""
+
+    def __init__(
+        self,
+        db: Database,
+        task: Dict[str, Any],
+        trigger_reason: str,
+        result_id: Optional[int] = None,
+    ):
         self.db = db
         self.task = task
         self.trigger_reason = trigger_reason
+        # 调度批量触发时由引擎预先批量建好 running 行，避免每任务一次 fsync
+        self.result_id = result_id
 
     def run(self) -> None:
         task_id = self.task["id"]
         logger.info("Executing task %s (%s)", task_id, self.trigger_reason)
-        result_id = self.db.record_result_start(task_id, self.trigger_reason)
+        result_id = self.result_id
+        if result_id is None:
+            result_id = self.db.record_result_start(task_id, self.trigger_reason)
         try:
             log_text, status = self._execute_script(self.task["script_body"], TASK_TIMEOUT)
         except Exception as exc:  # pylint: disable=broad-except
             status = "failed"
             log_text = f"任务执行异常: {exc!r}"
         finally:
-            self.db.finalize_result(result_id, status, log_text)
-            self.db.update_last_run(task_id)
+            self.db.finalize_task_run(task_id, result_id, status, log_text)
 
     def _execute_script(self, script: str, timeout: int) -> tuple[str, str]:
         cmd = self._build_command(script)
-        env = os.environ.copy()
+        env = _BASE_ENV.copy()
         preexec_fn, home_dir = self._prepare_account_context()
         if home_dir:
             env["HOME"] = home_dir
@@ -939,37 +1648,58 @@ class TaskRunner(threading.Thread):
                 "SCHEDULER_TRIGGER": self.trigger_reason,
             }
         )
+        # stderr 并入 stdout 单管道流式读取，环形缓冲限制日志占用内存；
+        # 全量 capture_output 会把长任务输出整段留在内存里
+        tail: deque[str] = deque(maxlen=MAX_LOG_LINES)
+        timed_out = threading.Event()
+        popen_kwargs: Dict[str, Any] = {
+            "stdout": PIPE,
+            "stderr": STDOUT,
+            "text": True,
+            "bufsize": 1,
+            "env": env,
+        }
+        if not IS_WINDOWS:
+            # 独立进程组：超时可以连同脚本派生的子进程一起终止，
+            # 否则残留子进程会占着管道让读取端一直阻塞
+            popen_kwargs["preexec_fn"] = preexec_fn
+            popen_kwargs["start_new_session"] = True
         try:
-            completed: CompletedProcess[str] = run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                check=False,
-                env=env,
-                preexec_fn=preexec_fn,
-            )
-        except TimeoutExpired as exc:
-            return f"任务执行超时 (>{timeout}s): {exc}", "failed"
+            proc = Popen(cmd, **popen_kwargs)
         except Exception as exc:  # pylint: disable=broad-except
             return str(exc), "failed"
-        output = (completed.stdout or "") + (completed.stderr or "")
-        status = "success" if completed.returncode == 0 else "failed"
-        return output.strip(), status
+
+        def _kill_on_timeout() -> None:
+            timed_out.set()
+            try:
+                if IS_WINDOWS:
+                    proc.kill()
+                else:
+                    os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+
+        timer = threading.Timer(timeout, _kill_on_timeout)
+        timer.start()
+        try:
+            assert proc.stdout is not None
+            for line in proc.stdout:
+                tail.append(line.rstrip("\n"))
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+        output = "\n".join(tail).strip()
+        if timed_out.is_set():
+            notice = f"任务执行超时 (>{timeout}s)，进程已终止"
+            return f"{output}\n{notice}".strip(), "failed"
+        status = "success" if returncode == 0 else "failed"
+        return output, status
 
     @staticmethod
     def _build_command(script: str) -> List[str]:
         if os.name == "nt":
-            return [
-                "powershell",
-                "-NoLogo",
-                "-NonInteractive",
-                "-ExecutionPolicy",
-                "Bypass",
-                "-Command",
-                script,
-            ]
-        return ["/bin/bash", "-c", script]
+            return [*_SHELL_PREFIX_NT, script]
+        return [*_SHELL_PREFIX_POSIX, script]
 
     def _prepare_account_context(self) -> tuple[Optional[Callable[[], None]], Optional[str]]:
         if not POSIX_ACCOUNT_SUPPORT:
@@ -978,26 +1708,18 @@ class TaskRunner(threading.Thread):
         if not account:
             return (None, None)
         try:
-            pw_record = pwd.getpwnam(account)  # type: ignore[attr-defined]
+            target_uid, target_gid, home_dir, supplemental = _resolve_account(account)
         except KeyError as exc:
             raise RuntimeError(f"账号 {account} 不存在，无法执行任务") from exc
 
-        target_uid = pw_record.pw_uid
-        target_gid = pw_record.pw_gid
         current_uid = os.geteuid()
 
         if current_uid == target_uid:
-            return (None, pw_record.pw_dir)
+            return (None, home_dir)
 
         if current_uid != 0:
             raise PermissionError("调度服务需以 root 运行才能切换任务执行账号")
 
-        supplemental: List[int] = []
-        try:
-            supplemental = [entry.gr_gid for entry in grp.getgrall() if account in entry.gr_mem]  # type: ignore[attr-defined]
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.warning("获取账号 %s 附加组失败: %s", account, exc)
-
         groups = sorted(set([target_gid, *supplemental]))
 
         def _changer() -> None:
@@ -1006,7 +1728,7 @@ class TaskRunner(threading.Thread):
                 os.setgroups(groups)
             os.setuid(target_uid)
 
-        return (_changer, pw_record.pw_dir)
+        return (_changer, home_dir)
 
 
 class SchedulerEngine:
@@ -1014,39 +1736,120 @@ class SchedulerEngine:
         self.db = db
         self.stop_event = threading.Event()
         self.thread = threading.Thread(target=self._loop, daemon=True)
+        # 有界工作线程池：突发批量触发时复用线程并提供背压，
+        # 任务主要在等子进程，给出比核数更高的并发上限
+        self.pool = ThreadPoolExecutor(
+            max_workers=(os.cpu_count() or 2) * 4,
+            thread_name_prefix="task",
+        )
+        # 条件检查独享小线程池：任务脚本可跑 900 秒，若与检查共用一个池，
+        # 池被长任务占满时检查会排在其后，调度线程阻塞、到期的定时任务被拖延
+        self.check_pool = ThreadPoolExecutor(
+            max_workers=4,
+            thread_name_prefix="cond",
+        )
+        # 任务被创建/修改/手动触发时置位，打断调度线程的休眠
+        self.wakeup_event = threading.Event()
         # 记录服务启动时间，用于跳过重启前已过期的定时任务
         self.started_at: Optional[datetime] = None
+        # 运行中任务集合常驻内存，去重判断不再每次打 SQL 探测
+        self._running: Set[int] = set()
+        self._running_lock = threading.Lock()
+        # 每轮评估内记忆依赖检查结果；thread-local 使调度线程与
+        # HTTP 批量操作互不干扰
+        self._dep_local = threading.local()
+
+    @contextmanager
+    def _with_dep_cache(self):
+        """Memoize _dependencies_met for one evaluation pass over many tasks."""
+        self._dep_local.cache = {}
+        try:
+            yield
+        finally:
+            self._dep_local.cache = None
+
+    def is_running(self, task_id: int) -> bool:
+        with self._running_lock:
+            return task_id in self._running
+
+    def _clear_running(self, task_id: int) -> None:
+        with self._running_lock:
+            self._running.discard(task_id)
+
+    def notify_change(self) -> None:
+        """Wake the scheduler loop early after task mutations."""
+        self.wakeup_event.set()
+
+    def submit_task(
+        self, task: Dict[str, Any], trigger_reason: str, result_id: Optional[int] = None
+    ) -> Future:
+        task_id = task["id"]
+        with self._running_lock:
+            self._running.add(task_id)
+        future = self.pool.submit(TaskRunner(self.db, task, trigger_reason, result_id).run)
+        future.add_done_callback(lambda _f: self._clear_running(task_id))
+        return future
 
     def start(self) -> None:
         # 标记启动时刻，之后复核过期任务时会基于此时间跳过历史遗留的执行
         self.started_at = time_now()
+        # 上个进程崩溃可能留下 running 行，启动时用 SQL 回填一次去重集合
+        try:
+            self._running.update(self.db.running_task_ids())
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Failed to rehydrate running task set")
         self.thread.start()
         self._trigger_system_event(EVENT_TYPE_BOOT)
 
     def stop(self) -> None:
         self.stop_event.set()
+        self.wakeup_event.set()
         self._trigger_system_event(EVENT_TYPE_SHUTDOWN)
         self.thread.join(timeout=5)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.check_pool.shutdown(wait=False, cancel_futures=True)
 
     # Internal ------------------------------------------------------------
+    # 休眠上限：即使没有任何近期任务也定期复核一次
+    MAX_IDLE_WAIT = 60.0
+    MIN_IDLE_WAIT = 0.25
+
     def _loop(self) -> None:
         while not self.stop_event.is_set():
+            self.wakeup_event.clear()
             now = time_now()
             try:
-                self._process_due_tasks(now)
-                self._process_event_tasks(now)
+                # 同一 tick 内共享依赖检查结果，公共前置只查一次
+                with self._with_dep_cache():
+                    self._process_due_tasks(now)
+                    self._process_event_tasks(now)
             except Exception as exc:  # pylint: disable=broad-except
                 logger.exception("Scheduler loop error: %s", exc)
-            self.stop_event.wait(1)
+            self.wakeup_event.wait(self._next_wake_delay(time_now()))
+
+    def _next_wake_delay(self, moment: datetime) -> float:
+        """Sleep until the next due run / condition check instead of a fixed tick."""
+        delay = self.MAX_IDLE_WAIT
+        try:
+            next_run = parse_iso(self.db.next_scheduled_run())
+            if next_run is not None:
+                delay = min(delay, (next_run - moment).total_seconds())
+            condition_due = self.db.next_condition_due_seconds(moment)
+            if condition_due is not None:
+                delay = min(delay, condition_due)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.exception("Failed to compute scheduler wake delay: %s", exc)
+            return 1.0
+        return max(self.MIN_IDLE_WAIT, delay)
 
     def _process_due_tasks(self, moment: datetime) -> None:
+        started_ts = self.started_at.timestamp() if self.started_at else None
+        runnable: List[Dict[str, Any]] = []
         for task in self.db.fetch_due_tasks(moment):
             # 跳过那些在服务启动之前就已经过期的任务（避免重启后回放执行）
-            try:
-                next_run_dt = parse_iso(task.get("next_run_at"))
-            except Exception:
-                next_run_dt = None
-            if self.started_at and next_run_dt and next_run_dt < self.started_at:
+            raw_next = task.get("next_run_at")
+            next_ts = _iso_to_ts(raw_next) if raw_next else None
+            if started_ts is not None and next_ts is not None and next_ts < started_ts:
                 logger.info(
                     "Skipping expired task %s scheduled at %s (service started at %s)",
                     task.get("id"),
@@ -1059,7 +1862,7 @@ class SchedulerEngine:
                 except Exception:
                     logger.exception("Failed to reschedule expired task %s", task.get("id"))
                 continue
-            if self.db.has_running_instance(task["id"]):
+            if self.is_running(task["id"]):
                 logger.info("Task %s still running, skip", task["id"])
                 continue
             if not self._dependencies_met(task):
@@ -1067,70 +1870,107 @@ class SchedulerEngine:
                 # re-schedule shortly in future to retry
                 self.db.schedule_next_run(task["id"], task["schedule_expression"], moment + timedelta(minutes=1))
                 continue
-            TaskRunner(self.db, task, "schedule").start()
+            runnable.append(task)
             self.db.schedule_next_run(task["id"], task["schedule_expression"], moment)
+        if runnable:
+            # 同一 tick 的 running 行单事务批量落库后再提交执行
+            result_ids = self.db.record_result_starts(
+                [(task["id"], "schedule") for task in runnable]
+            )
+            for task, result_id in zip(runnable, result_ids):
+                self.submit_task(task, "schedule", result_id)
 
     def _process_event_tasks(self, moment: datetime) -> None:
+        due_tasks: List[Dict[str, Any]] = []
+        # 到期判断用缓存的 epoch 秒做纯浮点比较，免去每任务一次 timedelta 分配
+        now_ts = moment.timestamp()
         for task in self.db.fetch_event_tasks(event_type=EVENT_TYPE_SCRIPT):
-            last_check = parse_iso(task.get("last_condition_check_at"))
+            raw_last = task.get("last_condition_check_at")
+            last_ts = _iso_to_ts(raw_last) if raw_last else None
             interval = task.get("condition_interval", 60)
-            if last_check and (moment - last_check).total_seconds() < interval:
-                continue
-            self.db.update_condition_check(task["id"])
-            if not task.get("condition_script"):
+            if last_ts is not None and (now_ts - last_ts) < interval:
                 continue
-            ok = self._run_condition(task)
-            if not ok:
+            due_tasks.append(task)
+        # 一次提交盖全部检查时间戳，避免每个事件任务一次 UPDATE+fsync
+        self.db.bulk_update_condition_check([task["id"] for task in due_tasks], moment)
+        # 条件脚本彼此独立，放到专用检查线程池里并发执行：
+        # 一轮检查耗时≈最慢的脚本，而不是所有脚本之和，且不与任务槽位争抢
+        checks = [
+            (task, self.check_pool.submit(self._run_condition, task))
+            for task in due_tasks
+            if task.get("condition_script")
+        ]
+        for task, future in checks:
+            if not future.result():
                 continue
-            if self.db.has_running_instance(task["id"]):
+            if self.is_running(task["id"]):
                 continue
             if not self._dependencies_met(task):
                 continue
-            TaskRunner(self.db, task, "condition").start()
+            self.submit_task(task, "condition")
 
     def _run_condition(self, task: Dict[str, Any]) -> bool:
         command = TaskRunner._build_command(task["condition_script"])
+        # 与 TaskRunner 一致使用独立进程组：超时不仅杀顶层 shell，
+        # 还连同条件脚本派生的子进程一起回收，避免残留进程吃 CPU
+        popen_kwargs: Dict[str, Any] = {"stdout": PIPE, "stderr": STDOUT, "text": True}
+        if not IS_WINDOWS:
+            popen_kwargs["start_new_session"] = True
         try:
-            completed = run(
-                command,
-                capture_output=True,
-                text=True,
-                timeout=CONDITION_TIMEOUT,
-                check=False,
+            proc = Popen(command, **popen_kwargs)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("Condition script for task %s failed: %s", task["id"], exc)
+            return False
+        try:
+            proc.communicate(timeout=CONDITION_TIMEOUT)
+        except TimeoutExpired:
+            try:
+                if IS_WINDOWS:
+                    proc.kill()
+                else:
+                    os.killpg(proc.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            proc.wait()
+            logger.warning(
+                "Condition script timeout (>%ss) for task %s", CONDITION_TIMEOUT, task["id"]
             )
-        except TimeoutExpired as exc:
-            logger.warning("Condition script timeout for task %s: %s", task["id"], exc)
             return False
         except Exception as exc:  # pylint: disable=broad-except
+            proc.kill()
+            proc.wait()
             logger.warning("Condition script for task %s failed: %s", task["id"], exc)
             return False
-        if completed.returncode != 0:
-            return False
-        return True
+        return proc.returncode == 0
 
     def _dependencies_met(self, task: Dict[str, Any]) -> bool:
-        deps = task.get("pre_task_ids") or []
-        for dep_id in deps:
-            result = self.db.get_latest_result(dep_id)
-            if not result or result.get("status") != "success":
-                return False
-        return True
+        deps = task.get("pre_task_ids")
+        if not deps:
+            return True
+        task_id = task["id"]
+        cache: Optional[Dict[int, bool]] = getattr(self._dep_local, "cache", None)
+        if cache is None:
+            return self.db.dependencies_met(task_id)
+        met = cache.get(task_id)
+        if met is None:
+            met = self.db.dependencies_met(task_id)
+            cache[task_id] = met
+        return met
 
     def _trigger_system_event(self, event_type: str) -> None:
         if event_type not in {EVENT_TYPE_BOOT, EVENT_TYPE_SHUTDOWN}:
             return
         trigger_reason = "system_boot" if event_type == EVENT_TYPE_BOOT else "system_shutdown"
-        runners: List[TaskRunner] = []
-        for task in self.db.fetch_event_tasks(event_type=event_type):
-            if self.db.has_running_instance(task["id"]):
-                continue
-            if not self._dependencies_met(task):
-                continue
-            runner = TaskRunner(self.db, task, trigger_reason)
-            runner.start()
-            runners.append(runner)
-        for runner in runners:
-            runner.join()
+        futures: List[Future] = []
+        with self._with_dep_cache():
+            for task in self.db.fetch_event_tasks(event_type=event_type):
+                if self.is_running(task["id"]):
+                    continue
+                if not self._dependencies_met(task):
+                    continue
+                futures.append(self.submit_task(task, trigger_reason))
+        if futures:
+            wait_futures(futures)
 
 
 ###############################################################################
@@ -1141,9 +1981,38 @@ class SchedulerContext:
     def __init__(self, db: Database, engine: SchedulerEngine):
         self.db = db
         self.engine = engine
+        # GET /api/tasks 响应缓存：(写连接 total_changes, ETag, 响应体)。
+        # SPA 每隔几秒轮询一次，库没有写入时直接复用字节串/回 304
+        self._tasks_cache: Optional[Tuple[int, str, bytes]] = None
+        self._tasks_cache_lock = threading.Lock()
+
+    def tasks_response(self) -> Tuple[str, bytes]:
+        """Return (etag, body) for the task list, rebuilt only after a DB write."""
+        version = self.db.write_version()
+        with self._tasks_cache_lock:
+            cached = self._tasks_cache
+            if cached is not None and cached[0] == version:
+                return cached[1], cached[2]
+        tasks = self.db.list_tasks()
+        latest = self.db.get_latest_results([task["id"] for task in tasks])
+        for task in tasks:
+            task["latest_result"] = latest.get(task["id"])
+        body = json.dumps({"data": tasks}, separators=(",", ":")).encode("utf-8")
+        etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        with self._tasks_cache_lock:
+            self._tasks_cache = (version, etag, body)
+        return etag, body
 
 
 class SchedulerHTTPServer(ThreadingHTTPServer):
+    # 突发并发（UI 轮询 + 静态资源）下加大 accept 积压，避免握手被内核拒绝
+    request_queue_size = 128
+    daemon_threads = True
+    # 连接处理走有界线程池：复用暖线程、内存有上限；超出水位直接 503 卸载。
+    # 保活连接在空闲超时前会占住 worker，下限取 8 保证单核机器也够浏览器并发
+    CONN_POOL_WORKERS = max(8, min(32, (os.cpu_count() or 1) * 4))
+    CONN_POOL_BACKLOG = CONN_POOL_WORKERS * 8
+
     def __init__(
         self,
         server_address,
@@ -1152,14 +2021,28 @@ class SchedulerHTTPServer(ThreadingHTTPServer):
         base_path: str = "/",
         prefer_ipv6: bool = False,
         auth_config: Optional[AuthConfig] = None,
+        unix_socket: Optional[str] = None,
     ):
-        host = server_address[0] if server_address else ""
-        port = server_address[1] if len(server_address) > 1 else 0
-        use_ipv6 = False
-        if (prefer_ipv6 or (host and ":" in host)) and socket.has_ipv6:
-            use_ipv6 = True
-        elif (prefer_ipv6 or (host and ":" in host)) and not socket.has_ipv6:
-            raise RuntimeError("当前系统不支持 IPv6 监听")
+        # 反向代理场景：绑定 Unix socket，TLS 由前端的 nginx/caddy 终结
+        self.unix_socket_path = unix_socket
+        if unix_socket:
+            if not hasattr(socket, "AF_UNIX"):
+                raise RuntimeError("当前系统不支持 Unix socket 监听")
+            self.address_family = socket.AF_UNIX
+            try:
+                os.unlink(unix_socket)  # 清理上次异常退出残留的 socket 文件
+            except FileNotFoundError:
+                pass
+            server_address = unix_socket
+            use_ipv6 = False
+        else:
+            host = server_address[0] if server_address else ""
+            port = server_address[1] if len(server_address) > 1 else 0
+            use_ipv6 = False
+            if (prefer_ipv6 or (host and ":" in host)) and socket.has_ipv6:
+                use_ipv6 = True
+            elif (prefer_ipv6 or (host and ":" in host)) and not socket.has_ipv6:
+                raise RuntimeError("当前系统不支持 IPv6 监听")
 
         self.base_path = base_path or "/"
         if use_ipv6:
@@ -1173,12 +2056,142 @@ class SchedulerHTTPServer(ThreadingHTTPServer):
             except OSError:
                 pass
         self.auth_config = auth_config
+        self._conn_pool = ThreadPoolExecutor(
+            max_workers=self.CONN_POOL_WORKERS, thread_name_prefix="http"
+        )
+        self._conn_active = 0
+        self._conn_lock = threading.Lock()
+
+    def process_request(self, request, client_address) -> None:  # type: ignore[override]
+        if self.unix_socket_path is None:
+            # 小 JSON 响应禁用 Nagle，避免与延迟 ACK 叠加出 40ms 尾延迟；
+            # 保活连接打开 TCP keepalive 让死连接及时回收
+            try:
+                request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                request.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+                if hasattr(socket, "TCP_QUICKACK"):
+                    request.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+            except OSError:
+                pass
+        with self._conn_lock:
+            if self._conn_active >= self.CONN_POOL_BACKLOG:
+                shed = True
+            else:
+                shed = False
+                self._conn_active += 1
+        if shed:
+            try:
+                request.sendall(
+                    b"HTTP/1.1 503 Service Unavailable\r\n"
+                    b"Content-Length: 0\r\nConnection: close\r\n\r\n"
+                )
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        self._conn_pool.submit(self._process_request_in_pool, request, client_address)
+
+    def _process_request_in_pool(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # pylint: disable=broad-except
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._conn_lock:
+                self._conn_active -= 1
+
+    def server_bind(self) -> None:  # type: ignore[override]
+        if self.unix_socket_path:
+            self.socket.bind(self.unix_socket_path)
+            self.server_name = self.unix_socket_path
+            self.server_port = 0
+            return
+        if hasattr(socket, "SO_REUSEPORT"):
+            # 多个服务进程可共用同一端口做水平扩展，内核负责分摊连接
+            try:
+                self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except OSError:
+                pass
+        super().server_bind()
+
+    def server_close(self) -> None:  # type: ignore[override]
+        super().server_close()
+        self._conn_pool.shutdown(wait=False, cancel_futures=True)
+        if self.unix_socket_path:
+            try:
+                os.unlink(self.unix_socket_path)
+            except OSError:
+                pass
+
+
+# 固定内容的响应体只序列化一次，热路径直接写缓存好的字节串
+_API_ROOT_BODY = json.dumps({"message": "scheduler api"}, separators=(",", ":")).encode("utf-8")
+_ERR_INVALID_JSON = json.dumps({"error": "Invalid JSON"}, separators=(",", ":")).encode("utf-8")
+_ERR_INTERNAL = json.dumps({"error": "internal server error"}, separators=(",", ":")).encode("utf-8")
+
+
+@lru_cache(maxsize=4)
+def _encode_accounts_body(accounts: Tuple[str, ...]) -> bytes:
+    payload = {
+        "data": list(accounts),
+        "meta": {
+            "posix_supported": POSIX_ACCOUNT_SUPPORT,
+            "default_account": DEFAULT_ACCOUNT_NAME,
+        },
+    }
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
 
 
 class SchedulerRequestHandler(SimpleHTTPRequestHandler):
+    # HTTP/1.1 持久连接：UI 轮询复用同一 TCP/TLS 连接，免去每请求握手。
+    # 所有响应路径都带 Content-Length，连接才能安全复用
+    protocol_version = "HTTP/1.1"
+    # 空闲连接占用池内线程，超时后关闭让出 worker
+    timeout = 30
+    # 全缓冲输出：状态行、响应头和 JSON 体合并成一次 write()/系统调用，
+    # 基类在每个请求结束时 flush；sendfile 路径在发送前自行 flush
+    wbufsize = -1
+
     def __init__(self, *args, directory: str | None = None, **kwargs):  # type: ignore[override]
         super().__init__(*args, directory=directory or STATIC_ROOT, **kwargs)
 
+    def handle_one_request(self) -> None:  # type: ignore[override]
+        self._body_consumed = False
+        super().handle_one_request()
+        self._drain_request_body()
+
+    def _drain_request_body(self) -> None:
+        """Discard an unread request body so the next pipelined request parses cleanly.
+
+        部分端点（run/DELETE 等）不读请求体；HTTP/1.0 一请求一连接时残留
+        字节随连接丢弃，保活连接上则会黏到下一个请求的起始行导致解析错乱。
+        未消费的 Content-Length 字节在此统一排空，超限或分块编码直接关连接
+        """
+        if self.close_connection or self._body_consumed:
+            return
+        headers = getattr(self, "headers", None)
+        if headers is None:
+            return
+        if headers.get("Transfer-Encoding"):
+            self.close_connection = True
+            return
+        try:
+            remaining = int(headers.get("Content-Length", "0"))
+        except ValueError:
+            remaining = 0
+        if remaining <= 0:
+            return
+        if remaining > MAX_REQUEST_BODY:
+            self.close_connection = True
+            return
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 65536))
+            if not chunk:
+                self.close_connection = True
+                return
+            remaining -= len(chunk)
+
     def do_GET(self) -> None:  # noqa: N802
         if not self._require_auth():
             return
@@ -1230,35 +2243,113 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
         self.send_error(HTTPStatus.NOT_FOUND, "Unsupported path")
 
     # Static --------------------------------------------------------------
+    # 带指纹缓存意义不大的 HTML 之外，静态资源允许浏览器缓存一小时
+    CACHEABLE_EXTENSIONS = {".js", ".css", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".woff", ".woff2"}
+
+    # 请求路径 -> (文件系统路径, SPA 回退后的请求路径)；静态目录在运行期
+    # 基本不变，目录/存在性判定的 syscall 只为每个路径付一次，SIGHUP 清空
+    _static_resolve_cache: Dict[str, Tuple[str, str]] = {}
+    _STATIC_RESOLVE_CACHE_MAX = 1024
+
     def _serve_static(self) -> None:
-        # Fallback to index.html for SPA routes
-        path = self.translate_path(self.path)
-        if os.path.isdir(path):
-            path = os.path.join(path, "index.html")
-        if not os.path.exists(path) and not os.path.splitext(self.path)[1]:
-            self.path = "/index.html"
-        return super().do_GET()
+        cached = self._static_resolve_cache.get(self.path)
+        if cached is not None:
+            path, self.path = cached
+        else:
+            request_path = self.path
+            # Fallback to index.html for SPA routes
+            path = self.translate_path(self.path)
+            if os.path.isdir(path):
+                path = os.path.join(path, "index.html")
+            if not os.path.exists(path) and not os.path.splitext(self.path)[1]:
+                self.path = "/index.html"
+                path = self.translate_path(self.path)
+            if len(self._static_resolve_cache) < self._STATIC_RESOLVE_CACHE_MAX:
+                self._static_resolve_cache[request_path] = (path, self.path)
+        self._static_cacheable = os.path.splitext(self.path)[1].lower() in self.CACHEABLE_EXTENSIONS
+        try:
+            etag = self._static_etag = self._compute_etag(path)
+            if etag and etag == self.headers.get("If-None-Match"):
+                # 条件请求命中：免去文件读取与传输
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.end_headers()
+                return
+            return super().do_GET()
+        finally:
+            self._static_cacheable = False
+            self._static_etag = None
+
+    @staticmethod
+    def _compute_etag(path: str) -> Optional[str]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return f'"{st.st_mtime_ns:x}-{st.st_size:x}"'
+
+    def send_response(self, code: HTTPStatus | int, message: Optional[str] = None) -> None:  # type: ignore[override]
+        # 记录状态码供 end_headers 判断；send_error 也经由此处
+        self._response_status = int(code)
+        super().send_response(code, message)
+
+    def end_headers(self) -> None:
+        # 缓存头只跟随 200/304：404 等错误响应若带 Cache-Control，
+        # 浏览器会把错误缓存一小时，坏发布修复后客户端迟迟不恢复
+        status = getattr(self, "_response_status", None)
+        if status in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            if getattr(self, "_static_cacheable", False):
+                self.send_header("Cache-Control", "public, max-age=3600")
+            etag = getattr(self, "_static_etag", None)
+            if etag:
+                self.send_header("ETag", etag)
+        super().end_headers()
+
+    def copyfile(self, source, outputfile) -> None:  # type: ignore[override]
+        """Send static files via os.sendfile when the transport allows zero-copy."""
+        # TLS 连接（SSLSocket 带 context 属性）不能绕过用户态加密；
+        # 鸭子类型判断避免为此加载 ssl 模块
+        if not hasattr(os, "sendfile") or getattr(self.connection, "context", None) is not None:
+            return super().copyfile(source, outputfile)
+        outputfile.flush()
+        # 经 socket.sendfile 调 os.sendfile：保活连接带 30s 超时，套接字处于
+        # 非阻塞模式，内核发送缓冲写满时裸 os.sendfile 会抛 EAGAIN 打断传输；
+        # socket.sendfile 自带等待可写的重试循环，源不支持零拷贝时
+        # 也会自动退回用户态 send
+        try:
+            self.connection.sendfile(source)
+        except ValueError:
+            # 源不是二进制文件对象（如目录列表的 BytesIO 变体），退回用户态拷贝
+            return super().copyfile(source, outputfile)
 
     # API routing ---------------------------------------------------------
+    # 无参数叶子端点按 (method, resource) 查表分发；templates/tasks 仍走
+    # 各自的子路由函数处理 id 与 action 段
+    _API_ROUTES: Dict[Tuple[str, str], str] = {
+        ("GET", "health"): "_health",
+        ("GET", "accounts"): "_list_accounts",
+    }
+    # 带子路由的资源同样查表，顶层分发不再做逐个字符串比较
+    _API_RESOURCES: Dict[str, str] = {
+        "templates": "_handle_templates",
+        "tasks": "_handle_tasks",
+    }
+
     def _handle_api(self, method: str) -> None:
-        parsed = urlparse(self.path)
-        segments = [segment for segment in parsed.path.split("/") if segment][1:]  # drop 'api'
+        # 与 _ensure_base_path 相同的轻量切分，免去 urlsplit 的对象分配
+        path, _, _ = self.path.partition("?")
+        segments = [segment for segment in path.split("/") if segment][1:]  # drop 'api'
         try:
             if not segments:
-                self._json_response({"message": "scheduler api"})
+                self._send_json_bytes(_API_ROOT_BODY)
                 return
             resource = segments[0]
-            if resource == "health" and method == "GET":
-                self._health()
-                return
-            if resource == "accounts" and method == "GET":
-                self._list_accounts()
+            handler_name = self._API_ROUTES.get((method, resource))
+            if handler_name is not None:
+                getattr(self, handler_name)()
                 return
-            if resource == "templates":
-                self._handle_templates(method, segments[1:])
-                return
-            if resource == "tasks":
-                self._handle_tasks(method, segments[1:])
+            resource_handler = self._API_RESOURCES.get(resource)
+            if resource_handler is not None:
+                getattr(self, resource_handler)(method, segments[1:])
                 return
             if resource == "results" and len(segments) >= 2:
                 task_id = int(segments[1])
@@ -1270,25 +2361,27 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
             self._json_response({"error": str(exc)}, status=HTTPStatus.BAD_REQUEST)
         except Exception as exc:  # pylint: disable=broad-except
             logger.exception("API error: %s", exc)
-            self._json_response({"error": "internal server error"}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+            self._send_json_bytes(_ERR_INTERNAL, status=HTTPStatus.INTERNAL_SERVER_ERROR)
 
     def _list_accounts(self) -> None:
-        payload = {
-            "data": list_allowed_accounts(),
-            "meta": {
-                "posix_supported": POSIX_ACCOUNT_SUPPORT,
-                "default_account": DEFAULT_ACCOUNT_NAME,
-            },
-        }
-        self._json_response(payload)
+        self._send_json_bytes(_encode_accounts_body(tuple(list_allowed_accounts())))
 
     def _handle_tasks(self, method: str, remainder: List[str]) -> None:
         ctx: SchedulerContext = self.server.app_context  # type: ignore[attr-defined]
         if method == "GET" and not remainder:
-            tasks = ctx.db.list_tasks()
-            for task in tasks:
-                task["latest_result"] = ctx.db.get_latest_result(task["id"])
-            self._json_response({"data": tasks})
+            etag, body = ctx.tasks_response()
+            if self.headers.get("If-None-Match") == etag:
+                # 轮询客户端拿 304，稳态下既不序列化也不传输
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(HTTPStatus.OK)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
             return
         if remainder and remainder[0] == "batch":
             if method != "POST":
@@ -1305,6 +2398,7 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
                 if payload is None:
                     return
                 task = ctx.db.create_task(payload)
+                ctx.engine.notify_change()
                 self._json_response(task, status=HTTPStatus.CREATED)
                 return
             self.send_error(HTTPStatus.METHOD_NOT_ALLOWED)
@@ -1327,6 +2421,7 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
                 if not task:
                     self.send_error(HTTPStatus.NOT_FOUND)
                     return
+                ctx.engine.notify_change()
                 self._json_response(task)
                 return
             if method == "DELETE":
@@ -1429,14 +2524,11 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
         task_ids_payload = payload.get("task_ids")
         if not isinstance(task_ids_payload, list) or not task_ids_payload:
             raise ValueError("task_ids 不能为空")
-        task_ids = []
-        for raw in task_ids_payload:
-            try:
-                tid = int(raw)
-            except (TypeError, ValueError) as exc:
-                raise ValueError("task_ids 必须为整数") from exc
-            if tid > 0 and tid not in task_ids:
-                task_ids.append(tid)
+        # dict 保序去重，大批量 id 不再做 O(n²) 的 list 成员查找
+        try:
+            task_ids = list(dict.fromkeys(tid for raw in task_ids_payload if (tid := int(raw)) > 0))
+        except (TypeError, ValueError) as exc:
+            raise ValueError("task_ids 必须为整数") from exc
         if not task_ids:
             raise ValueError("未提供有效的 task_ids")
 
@@ -1444,42 +2536,45 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
             raise ValueError("action 不支持")
 
         result: Dict[str, List[int]] = {"missing": []}
-        runners: List[TaskRunner] = []
-
-        for task_id in task_ids:
-            task = ctx.db.get_task(task_id)
-            if not task:
-                result.setdefault("missing", []).append(task_id)
-                continue
-
-            if action == "delete":
-                if ctx.db.delete_task(task_id):
-                    result.setdefault("deleted", []).append(task_id)
-                else:
-                    result.setdefault("missing", []).append(task_id)
-                continue
-
-            if action in {"enable", "disable"}:
-                target_state = action == "enable"
-                if bool(task["is_active"]) == target_state:
-                    result.setdefault("unchanged", []).append(task_id)
-                    continue
-                ctx.db.update_task(task_id, {"is_active": target_state})
-                result.setdefault("updated", []).append(task_id)
-                continue
-
-            if action == "run":
-                if ctx.db.has_running_instance(task_id):
-                    result.setdefault("running", []).append(task_id)
-                    continue
-                if not ctx.engine._dependencies_met(task):  # pylint: disable=protected-access
-                    result.setdefault("blocked", []).append(task_id)
-                    continue
-                runner = TaskRunner(ctx.db, task, "manual")
-                runner.start()
-                runners.append(runner)
-                result.setdefault("queued", []).append(task_id)
 
+        # 整批一次取出并按集合分类，状态迁移各自合并为单条 SQL；
+        # 仅 run 需要完整行，删除/启停用轻量的 id/is_active 查询分类
+        if action == "run":
+            tasks = ctx.db.get_tasks_bulk(task_ids)
+            states: Dict[int, bool] = {tid: True for tid in tasks}
+        else:
+            tasks = {}
+            states = ctx.db.get_task_states_bulk(task_ids)
+        result["missing"] = [tid for tid in task_ids if tid not in states]
+        present = [tid for tid in task_ids if tid in states]
+
+        if action == "delete":
+            ctx.db.delete_tasks_bulk(present)
+            if present:
+                result["deleted"] = present
+        elif action in {"enable", "disable"}:
+            target_state = action == "enable"
+            unchanged = [tid for tid in present if states[tid] == target_state]
+            to_update = [tid for tid in present if states[tid] != target_state]
+            ctx.db.set_active_bulk(to_update, target_state)
+            if unchanged:
+                result["unchanged"] = unchanged
+            if to_update:
+                result["updated"] = to_update
+        else:  # run
+            # 同批任务常共享前置，依赖检查结果在本次循环内复用
+            with ctx.engine._with_dep_cache():
+                for task_id in present:
+                    if ctx.engine.is_running(task_id):
+                        result.setdefault("running", []).append(task_id)
+                        continue
+                    if not ctx.engine._dependencies_met(tasks[task_id]):  # pylint: disable=protected-access
+                        result.setdefault("blocked", []).append(task_id)
+                        continue
+                    ctx.engine.submit_task(tasks[task_id], "manual")
+                    result.setdefault("queued", []).append(task_id)
+
+        ctx.engine.notify_change()
         payload = {"action": action, "result": result}
         self._json_response(payload)
 
@@ -1489,13 +2584,13 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
         if not task:
             self.send_error(HTTPStatus.NOT_FOUND)
             return
-        if ctx.db.has_running_instance(task_id):
+        if ctx.engine.is_running(task_id):
             self._json_response({"error": "任务正在执行"}, status=HTTPStatus.CONFLICT)
             return
         if not ctx.engine._dependencies_met(task):  # pylint: disable=protected-access
             self._json_response({"error": "前置任务尚未成功"}, status=HTTPStatus.BAD_REQUEST)
             return
-        TaskRunner(ctx.db, task, "manual").start()
+        ctx.engine.submit_task(task, "manual")
         self._json_response({"queued": True})
 
     def _toggle_task(self, task_id: int, payload: Dict[str, Any]) -> None:
@@ -1506,93 +2601,157 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
             return
         is_active = bool(payload.get("is_active", not task["is_active"]))
         updated = ctx.db.update_task(task_id, {"is_active": is_active})
+        ctx.engine.notify_change()
         self._json_response(updated)
 
+    # 结果行带完整日志文本，行数多时按行分块流式发送，避免拼出整个响应体
+    STREAM_MIN_ROWS = 20
+
     def _list_results(self, task_id: int) -> None:
         ctx: SchedulerContext = self.server.app_context  # type: ignore[attr-defined]
-        query = parse_qs(urlparse(self.path).query)
-        limit = int(query.get("limit", [50])[0])
-        offset = int(query.get("offset", [0])[0])
-        results = ctx.db.fetch_results(task_id, limit=limit, offset=offset)
-        self._json_response({"data": results})
+        # parse_qsl + dict 免去 parse_qs 给每个值包一层 list；limit 夹上限
+        qs = self.path.partition("?")[2]
+        params = dict(parse_qsl(qs)) if qs else {}
+        limit = min(int(params.get("limit", 50)), 500)
+        offset = int(params.get("offset", 0))
+        before = params.get("before")
+        # 复合游标：before 取上一页末行的 started_at，before_id 取其 id。
+        # 结果行本身带 id，客户端翻页时照抄末行两个字段即可
+        raw_before_id = params.get("before_id")
+        before_id = int(raw_before_id) if raw_before_id else None
+        results = ctx.db.fetch_results(
+            task_id, limit=limit, offset=offset, before=before, before_id=before_id
+        )
+        if len(results) >= self.STREAM_MIN_ROWS and self.request_version != "HTTP/1.0":
+            self._json_stream_response(results)
+        else:
+            self._json_response({"data": results})
+
+    def _json_stream_response(self, rows: List[Dict[str, Any]], status: HTTPStatus | int = HTTPStatus.OK) -> None:
+        """以 chunked 编码逐行序列化 {"data": [...]}。
+
+        每行独立 dumps 成一个 chunk，内存峰值从「整个响应体」降到
+        「单行」；首字节也能在全部序列化完成前发出。
+        """
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        write = self.wfile.write
+
+        def chunk(piece: bytes) -> None:
+            write(f"{len(piece):X}\r\n".encode("ascii"))
+            write(piece)
+            write(b"\r\n")
+
+        chunk(b'{"data":[')
+        for index, row in enumerate(rows):
+            encoded = json.dumps(row, separators=(",", ":")).encode("utf-8")
+            chunk(b"," + encoded if index else encoded)
+        chunk(b"]}")
+        write(b"0\r\n\r\n")
 
     def _health(self) -> None:
         ctx: SchedulerContext = self.server.app_context  # type: ignore[attr-defined]
-        tasks = ctx.db.list_tasks()
         payload = {
             "time": isoformat(time_now()),
-            "task_count": len(tasks),
+            "task_count": ctx.db.count_tasks(),
         }
         self._json_response(payload)
 
     # Utilities -----------------------------------------------------------
     def _read_json(self) -> Optional[Dict[str, Any]]:
         length = int(self.headers.get("Content-Length", "0"))
+        if length > MAX_REQUEST_BODY:
+            self.send_error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+            return None
+        self._body_consumed = True
         raw = self.rfile.read(length) if length else b""
         if not raw:
             return {}
         try:
-            return json.loads(raw.decode("utf-8"))
-        except json.JSONDecodeError:
-            self._json_response({"error": "Invalid JSON"}, status=HTTPStatus.BAD_REQUEST)
+            # json.loads 直接吃 bytes（自动按 UTF-8 解码），省去一次完整拷贝
+            return json.loads(raw)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._send_json_bytes(_ERR_INVALID_JSON, status=HTTPStatus.BAD_REQUEST)
             return None
 
     def _json_response(self, payload: Any, status: HTTPStatus | int = HTTPStatus.OK) -> None:
-        body = json.dumps(payload).encode("utf-8")
+        self._send_json_bytes(json.dumps(payload, separators=(",", ":")).encode("utf-8"), status)
+
+    def _send_json_bytes(self, body: bytes, status: HTTPStatus | int = HTTPStatus.OK) -> None:
         self.send_response(status)
         self.send_header("Content-Type", "application/json; charset=utf-8")
         self.send_header("Content-Length", str(len(body)))
         self.end_headers()
         self.wfile.write(body)
 
+    def address_string(self) -> str:  # type: ignore[override]
+        # 直接返回对端 IP，绕开基类可能触发的反向 DNS 查询；
+        # Unix socket 的对端地址为空串
+        return self.client_address[0] if self.client_address else "local"
+
     def log_message(self, format_: str, *args: Any) -> None:  # noqa: D401
-        logger.info("%s - - %s", self.address_string(), format_ % args)
+        # INFO 关闭时完全跳过格式化；开启时把展开交给 logging 延迟执行
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s - - " + format_, self.address_string(), *args)
 
     def _require_auth(self) -> bool:
-        auth_config: Optional[AuthConfig] = getattr(self.server, "auth_config", None)  # type: ignore[attr-defined]
+        # SchedulerHTTPServer.__init__ 保证属性存在，直接读省掉带默认值的 getattr
+        auth_config: Optional[AuthConfig] = self.server.auth_config  # type: ignore[attr-defined]
         if not auth_config:
             return True
         header = self.headers.get("Authorization")
+        if header and auth_config.check_cached(header):
+            return True
         username, password = self._parse_basic_header(header)
         if username and password and auth_config.verify(username, password):
+            auth_config.remember(header)
             return True
         self._send_auth_challenge(auth_config.realm)
         return False
 
     def _send_auth_challenge(self, realm: str) -> None:
+        body = b"Authentication required"
+        # 请求体尚未读取，连接上可能残留字节，不能复用
+        self.close_connection = True
         self.send_response(HTTPStatus.UNAUTHORIZED)
         self.send_header("WWW-Authenticate", f'Basic realm="{realm}", charset="UTF-8"')
         self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(b"Authentication required")
+        self.wfile.write(body)
 
     @staticmethod
     def _parse_basic_header(header: Optional[str]) -> tuple[Optional[str], Optional[str]]:
-        if not header or not header.startswith("Basic "):
+        if not header or header[:6] != "Basic ":
             return (None, None)
-        token = header.split(" ", 1)[1].strip()
         try:
-            decoded = base64.b64decode(token).decode("utf-8")
+            decoded = _b64decode(header[6:].strip())
         except Exception:  # pylint: disable=broad-except
             return (None, None)
-        if ":" not in decoded:
+        # 在字节串上切分冒号，仅在格式合法时才做 UTF-8 解码
+        username, sep, password = decoded.partition(b":")
+        if not sep:
+            return (None, None)
+        try:
+            return (username.decode("utf-8"), password.decode("utf-8"))
+        except UnicodeDecodeError:
             return (None, None)
-        username, password = decoded.split(":", 1)
-        return (username, password)
 
     def _ensure_base_path(self) -> bool:
-        base_path = getattr(self.server, "base_path", "/")  # type: ignore[attr-defined]
+        base_path = self.server.base_path  # type: ignore[attr-defined]
         if base_path in ("", "/"):
             return True
-        parsed = urlsplit(self.path)
-        if not parsed.path.startswith(base_path):
+        # 固定前缀裁剪只需一次 '?' 切分，不必整段 urlsplit/urlunsplit
+        path, sep, query = self.path.partition("?")
+        if not path.startswith(base_path):
             self.send_error(HTTPStatus.NOT_FOUND, "Base path mismatch")
             return False
-        stripped_path = parsed.path[len(base_path) :] or "/"
+        stripped_path = path[len(base_path):] or "/"
         if not stripped_path.startswith("/"):
             stripped_path = f"/{stripped_path}"
-        rebuilt = parsed._replace(path=stripped_path)
-        self.path = urlunsplit(rebuilt)
+        self.path = f"{stripped_path}{sep}{query}"
         return True
 
 
@@ -1600,6 +2759,46 @@ class SchedulerRequestHandler(SimpleHTTPRequestHandler):
 # Entrypoint
 ###############################################################################
 
+AUTH_RELOAD_INTERVAL = 5.0
+
+
+def _start_auth_reloader(httpd: "SchedulerHTTPServer", path: str) -> None:
+    """后台轮询 auth 配置的 mtime，运维改口令无需重启服务。
+
+    轮询只做一次 stat；mtime 变化才重新解析文件。新 AuthConfig 通过属性
+    赋值原子替换，_require_auth 每请求重新取 server.auth_config 即生效。
+    解析失败或文件缺失时保留旧配置，避免坏文件或非原子改写（unlink+write）
+    的缺失窗口导致认证整体关闭；关停认证须由运维显式重启完成。
+    """
+
+    def _mtime() -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    last = _mtime()
+
+    def _loop() -> None:
+        nonlocal last
+        while True:
+            time.sleep(AUTH_RELOAD_INTERVAL)
+            current = _mtime()
+            if current == last:
+                continue
+            last = current
+            if current is None:
+                logger.error("Auth config %s missing, keeping previous", path)
+                continue
+            try:
+                httpd.auth_config = load_auth_config(path)
+                logger.info("Auth config reloaded from %s", path)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error("Auth config reload failed, keeping previous: %s", exc)
+
+    threading.Thread(target=_loop, name="auth-reload", daemon=True).start()
+
+
 def run_server(
     host: str,
     port: int,
@@ -1630,15 +2829,28 @@ def run_server(
         logger.warning("auth 配置文件不存在: %s，Basic Auth 未启用", auth_config_path)
     if auth_config:
         logger.info("Basic Auth enabled for Web UI (realm=%s, user=%s)", auth_config.realm, auth_config.username)
+    unix_socket: Optional[str] = None
+    if host.startswith("unix:"):
+        # unix:/run/scheduler.sock —— TLS 交给前端反向代理终结
+        unix_socket = host[len("unix:"):]
+        if not unix_socket:
+            raise ValueError("unix: 监听地址缺少 socket 路径")
+        if enable_ssl or ssl_cert or ssl_key:
+            raise ValueError("Unix socket 监听与 --ssl 互斥，请在反向代理上终结 TLS")
     httpd = SchedulerHTTPServer(
         (host, port),
         handler_class,
         base_path=normalized_base,
         prefer_ipv6=prefer_ipv6,
         auth_config=auth_config,
+        unix_socket=unix_socket,
     )
     httpd.app_context = ctx  # type: ignore[attr-defined]
 
+    if auth_config_path:
+        # 每 5s 比对一次 mtime，变更才重新解析；替换引用对 _require_auth 原子可见
+        _start_auth_reloader(httpd, auth_config_path)
+
     generated_cert_dir: Optional[str] = None
     if enable_ssl and not (ssl_cert and ssl_key):
         cert_days = int(os.environ.get("SCHEDULER_SSL_DAYS", "365"))
@@ -1657,10 +2869,22 @@ def run_server(
             raise FileNotFoundError(f"SSL 证书不存在: {ssl_cert}")
         if not os.path.exists(ssl_key):
             raise FileNotFoundError(f"SSL 私钥不存在: {ssl_key}")
+        import ssl  # OpenSSL 库加载有感知成本，未启用 HTTPS 时不引入
+
         context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
         if hasattr(context, "minimum_version") and hasattr(ssl, "TLSVersion"):
             context.minimum_version = ssl.TLSVersion.TLSv1_2  # type: ignore[attr-defined]
+        # 单一共享上下文：握手协商限定到 AEAD 套件，禁用 TLS 压缩，
+        # OpenSSL 的会话缓存让浏览器复用会话免去完整握手
+        context.options |= ssl.OP_NO_COMPRESSION
+        try:
+            context.set_ciphers("ECDHE+AESGCM:ECDHE+CHACHA20")
+        except ssl.SSLError:
+            pass  # 老版本 OpenSSL 不识别时保留默认套件
+        if hasattr(context, "set_alpn_protocols"):
+            context.set_alpn_protocols(["http/1.1"])
         context.load_cert_chain(certfile=ssl_cert, keyfile=ssl_key)
+        httpd.ssl_context = context  # 握手全部经由监听 socket 共享此上下文
         httpd.socket = context.wrap_socket(httpd.socket, server_side=True)
         scheme = "https"
         logger.info("HTTPS enabled using cert=%s key=%s", ssl_cert, ssl_key)
@@ -1678,6 +2902,16 @@ def run_server(
         if hasattr(signal, sig_name):
             signal.signal(getattr(signal, sig_name), _handle_signal)
 
+    if hasattr(signal, "SIGHUP"):
+
+        def _handle_sighup(_signum: int, _frame: Any | None) -> None:
+            # 运维新增/调整系统账号或改动静态资源后发 SIGHUP 即可立刻生效
+            _invalidate_account_cache()
+            SchedulerRequestHandler._static_resolve_cache.clear()
+            logger.info("Received SIGHUP, account and static-path caches invalidated")
+
+        signal.signal(signal.SIGHUP, _handle_sighup)
+
     logger.info(
         "Starting scheduler on %s://%s:%s%s (db=%s)",
         scheme,
@@ -1696,6 +2930,8 @@ def run_server(
         database.close()
         httpd.server_close()
         if generated_cert_dir:
+            import shutil
+
             shutil.rmtree(generated_cert_dir, ignore_errors=True)
 
 